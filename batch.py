@@ -0,0 +1,178 @@
+"""Batch QR generation for asset-tag labels.
+
+Reads (text, caption) rows from a CSV or newline file and renders them with
+the same logo and caption compositing as the app, spread over a process pool.
+
+    python batch.py labels.csv out/
+    python batch.py labels.txt labels.zip --workers 8
+    python batch.py labels.csv print/ --format pdf
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from qrcode.exceptions import DataOverflowError
+
+from renderer import RenderOptions, render_png
+from vector import EXPORTERS
+
+FORMATS = {'png': render_png}
+FORMATS.update(EXPORTERS)
+
+
+def read_rows(path):
+    """Yield (text, caption) pairs; .csv files may carry a caption column."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            for row in csv.reader(f):
+                if not row or not row[0].strip():
+                    continue
+                caption = row[1].strip() if len(row) > 1 else ''
+                yield row[0].strip(), caption
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line, ''
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_chunk(chunk, box_size, logo_path, fmt='png'):
+    """Return ([(name, bytes)], [(index, reason)]) for the rows of one chunk."""
+    # Runs in a worker process; the logo/font caches stay warm per process
+    render = FORMATS[fmt]
+    out = []
+    skipped = []
+    for index, (text, caption) in chunk:
+        options = RenderOptions(data=text, caption=caption, box_size=box_size, logo_path=logo_path)
+        try:
+            out.append((f"QR_{index:05d}.{fmt}", render(options)))
+        except (ValueError, DataOverflowError) as e:
+            # Typically data too long for any QR version; one bad row must not sink the run
+            skipped.append((index, str(e) or 'data too long'))
+    return out, skipped
+
+
+class DirWriter:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name, data):
+        with open(os.path.join(self.path, name), 'wb') as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+
+class ZipWriter:
+    def __init__(self, path):
+        # PNG and PDF streams are already deflated; SVG text still compresses well
+        self.zf = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED)
+
+    def write(self, name, data):
+        compress = zipfile.ZIP_DEFLATED if name.endswith('.svg') else zipfile.ZIP_STORED
+        self.zf.writestr(name, data, compress_type=compress)
+
+    def close(self):
+        self.zf.close()
+
+
+def open_writer(path):
+    if path.lower().endswith('.zip'):
+        return ZipWriter(path)
+    return DirWriter(path)
+
+
+def run_batch(src, dest, workers=None, box_size=10, logo_path='icon.png', chunk_size=64, progress=None, fmt='png'):
+    """Render every row of ``src`` into ``dest``. Returns (count, seconds, skipped).
+
+    ``skipped`` lists (row index, reason) for rows that could not be encoded.
+
+    At most ``workers * 2`` chunks are in flight, so memory stays bounded no
+    matter how long the input is.
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = open_writer(dest)
+    count = 0
+    skipped = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for chunk in chunked(enumerate(read_rows(src), 1), chunk_size):
+                in_flight.append(pool.submit(render_chunk, chunk, box_size, logo_path, fmt))
+                if len(in_flight) >= workers * 2:
+                    count += _drain_one(in_flight, writer, skipped)
+                    if progress:
+                        progress(count, time.perf_counter() - start)
+            while in_flight:
+                count += _drain_one(in_flight, writer, skipped)
+                if progress:
+                    progress(count, time.perf_counter() - start)
+    finally:
+        writer.close()
+    return count, time.perf_counter() - start, skipped
+
+
+def _drain_one(in_flight, writer, skipped):
+    results, bad = in_flight.popleft().result()
+    for name, data in results:
+        writer.write(name, data)
+    skipped.extend(bad)
+    return len(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-render QR codes from a CSV or text file.")
+    parser.add_argument('src', help="CSV (text,caption) or newline-separated text file")
+    parser.add_argument('dest', help="output directory, or a .zip file")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--box-size', type=int, default=10)
+    parser.add_argument('--logo', default='icon.png', help="logo image to overlay")
+    parser.add_argument('--no-logo', action='store_true')
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--format', choices=sorted(FORMATS), default='png', help="output format (svg/pdf are vector)")
+    args = parser.parse_args(argv)
+
+    def progress(count, elapsed):
+        rate = count / elapsed if elapsed else 0.0
+        print(f"\r{count} codes  {rate:.0f}/s", end='', file=sys.stderr, flush=True)
+
+    count, elapsed, skipped = run_batch(
+        args.src, args.dest,
+        workers=args.workers,
+        box_size=args.box_size,
+        logo_path=None if args.no_logo else args.logo,
+        chunk_size=args.chunk_size,
+        progress=progress,
+        fmt=args.format,
+    )
+    rate = count / elapsed if elapsed else 0.0
+    print(f"\nRendered {count} codes in {elapsed:.2f}s ({rate:.0f} codes/s) -> {args.dest}", file=sys.stderr)
+    for index, reason in sorted(skipped):
+        print(f"Skipped row {index}: {reason}", file=sys.stderr)
+    if skipped:
+        print(f"{len(skipped)} rows skipped", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Headless benchmarks for the QR render pipeline.
+
+Times each stage of renderer.render_qr separately (matrix build,
+rasterization, logo overlay, caption layout, PNG encode) over a sweep of
+payload length, box size, caption length and logo presence:
+
+    python bench_render.py run --json before.json
+    python bench_render.py run --quick --json after.json
+    python bench_render.py compare before.json after.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import renderer
+from renderer import RenderOptions
+
+STAGES = ('matrix', 'raster', 'logo', 'caption', 'png')
+
+SWEEP = {
+    'payload_len': (16, 128, 512, 1500),
+    'box_size': (4, 10, 20),
+    'caption_len': (0, 12, 48),
+    'logo': (False, True),
+}
+QUICK_SWEEP = {
+    'payload_len': (16, 512),
+    'box_size': (10,),
+    'caption_len': (0, 12),
+    'logo': (False, True),
+}
+
+
+def time_stages(options, repeat, cold=False):
+    """Return {stage: best seconds} plus the QR version for one configuration."""
+    best = dict.fromkeys(STAGES, float('inf'))
+    version = None
+    for _ in range(repeat):
+        if cold:
+            renderer.clear_logo_cache()
+            renderer.get_font.cache_clear()
+            renderer.measure_text.cache_clear()
+
+        t0 = time.perf_counter()
+        qr = renderer.build_qr(options)
+        t1 = time.perf_counter()
+        img = renderer.rasterize(qr, options)
+        t2 = time.perf_counter()
+        img = renderer.overlay_logo(img, options.logo_path)
+        t3 = time.perf_counter()
+        img = renderer.draw_caption(img, options.caption, options.font_path)
+        t4 = time.perf_counter()
+        renderer.encode_png(img)
+        t5 = time.perf_counter()
+
+        version = qr.version
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+            best[stage] = min(best[stage], elapsed)
+    return best, version
+
+
+def run_sweep(sweep, repeat=5, cold=False, logo_path='icon.png'):
+    results = []
+    keys = list(sweep)
+    for values in itertools.product(*(sweep[k] for k in keys)):
+        params = dict(zip(keys, values))
+        options = RenderOptions(
+            data='x' * params['payload_len'],
+            caption='C' * params['caption_len'],
+            box_size=params['box_size'],
+            logo_path=logo_path if params['logo'] else None,
+        )
+        stages, version = time_stages(options, repeat, cold)
+        row = dict(params, version=version)
+        row.update({f"{stage}_ms": 1000 * stages[stage] for stage in STAGES})
+        row['total_ms'] = sum(row[f"{stage}_ms"] for stage in STAGES)
+        results.append(row)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def row_key(row):
+    return tuple(row[k] for k in SWEEP)
+
+
+def cmd_run(args):
+    sweep = QUICK_SWEEP if args.quick else SWEEP
+    results = run_sweep(sweep, repeat=args.repeat, cold=args.cold, logo_path=args.logo)
+
+    header = f"{'len':>5} {'box':>4} {'cap':>4} {'logo':>5} {'ver':>4} " + ' '.join(f"{s:>8}" for s in STAGES) + f" {'total':>8}"
+    print(header)
+    for r in results:
+        print(f"{r['payload_len']:5d} {r['box_size']:4d} {r['caption_len']:4d} {str(r['logo']):>5} {r['version']:4d} "
+              + ' '.join(f"{r[f'{s}_ms']:8.2f}" for s in STAGES) + f" {r['total_ms']:8.2f}")
+
+    if args.json:
+        report = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'numpy': renderer.HAS_NUMPY,
+            'repeat': args.repeat,
+            'cold': args.cold,
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def cmd_compare(args):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    base = {row_key(r): r for r in before['results']}
+
+    print(f"{before.get('revision')} -> {after.get('revision')}")
+    regressions = 0
+    for r in after['results']:
+        old = base.get(row_key(r))
+        if old is None:
+            continue
+        ratio = r['total_ms'] / old['total_ms'] if old['total_ms'] else 1.0
+        flag = ''
+        if ratio > 1 + args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"len={r['payload_len']:<5d} box={r['box_size']:<3d} cap={r['caption_len']:<3d} logo={str(r['logo']):<5} "
+              f"{old['total_ms']:8.2f} -> {r['total_ms']:8.2f} ms  x{ratio:.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the QR render pipeline stage by stage.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help="run the parameter sweep")
+    p.add_argument('--quick', action='store_true', help="small sweep for CI")
+    p.add_argument('--repeat', type=int, default=5, help="runs per configuration; best time is kept")
+    p.add_argument('--cold', action='store_true', help="clear logo and font caches before every run")
+    p.add_argument('--logo', default='icon.png')
+    p.add_argument('--json', help="write results to this file")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('compare', help="compare two result files")
+    p.add_argument('before')
+    p.add_argument('after')
+    p.add_argument('--threshold', type=float, default=0.15, help="slowdown ratio that counts as a regression")
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Offline scanner benchmarks.
+
+Replay recorded frames (a directory of images or a video file) through the
+same FrameDecoder path that ScannerScreen.detect_qr uses, no camera needed:
+
+    python bench_scan.py synth frames/ --count 200
+    python bench_scan.py replay frames/ --json scan.json
+    python bench_scan.py replay clip.mp4 --allocs
+    python bench_scan.py replay frames/ --single   # first-code-only mode
+
+Compare the available scan engines on the same corpus of frames:
+
+    python bench_scan.py engines frames/
+    python bench_scan.py engines frames/ --engines pyzbar,opencv --json out.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image as PilImage, ImageFilter
+
+import scanner
+from renderer import RenderOptions, render_qr
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+
+
+def load_corpus(path):
+    """Yield (name, gray uint8 array) for every image in a directory."""
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(IMAGE_EXTS):
+            img = PilImage.open(os.path.join(path, name)).convert('L')
+            yield name, np.ascontiguousarray(np.asarray(img))
+
+
+def load_frames(path, limit=None):
+    """Yield (name, (w, h, rgba_bytes)) frames shaped like camera texture pixels."""
+    if os.path.isdir(path):
+        names = [n for n in sorted(os.listdir(path)) if n.lower().endswith(IMAGE_EXTS)]
+        for name in names[:limit]:
+            img = PilImage.open(os.path.join(path, name)).convert('RGBA')
+            yield name, (img.size[0], img.size[1], img.tobytes())
+        return
+
+    # Anything else is treated as a video file
+    import cv2
+    cap = cv2.VideoCapture(path)
+    index = 0
+    try:
+        while limit is None or index < limit:
+            ok, bgr = cap.read()
+            if not ok:
+                break
+            rgba = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGBA)
+            h, w = rgba.shape[:2]
+            yield f"frame_{index:05d}", (w, h, rgba.tobytes())
+            index += 1
+    finally:
+        cap.release()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def replay(frames, engine='auto', allocs=False, multi=True):
+    """Run frames through a fresh FrameDecoder and collect timing stats."""
+    decoder = scanner.FrameDecoder(engine, multi=multi)
+    times = []
+    alloc_bytes = []
+    decoded = 0
+    start = time.perf_counter()
+    for _, frame in frames:
+        if allocs:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        payloads = decoder(frame)
+        times.append(time.perf_counter() - t0)
+        if allocs:
+            alloc_bytes.append(tracemalloc.get_traced_memory()[1] - base)
+        decoded += payloads is not None
+    wall = time.perf_counter() - start
+
+    n = len(times)
+    ordered = sorted(times)
+    result = {
+        'frames': n,
+        'decoded': decoded,
+        'success_rate': decoded / n if n else 0.0,
+        'fps': n / wall if wall else 0.0,
+        'p50_ms': 1000 * percentile(ordered, 50),
+        'p90_ms': 1000 * percentile(ordered, 90),
+        'p99_ms': 1000 * percentile(ordered, 99),
+        'max_ms': 1000 * ordered[-1] if ordered else 0.0,
+        'strategy_hits': dict(decoder.stats),
+    }
+    if allocs:
+        result['alloc_kb_per_frame'] = sum(alloc_bytes) / 1024.0 / n if n else 0.0
+    return result
+
+
+def synth_frame(data, rng, size=(640, 480)):
+    """Render a code with the app's pipeline and degrade it like a camera would."""
+    code = render_qr(RenderOptions(data=data, caption=rng.choice(['', 'ASSET'])))
+    scale = rng.uniform(0.4, 1.0)
+    side = int(min(size) * scale)
+    code = code.resize((side, int(side * code.size[1] / code.size[0])), PilImage.Resampling.BILINEAR)
+    code = code.rotate(rng.uniform(-25, 25), resample=PilImage.Resampling.BILINEAR, expand=True, fillcolor=(255, 255, 255, 255))
+
+    grey = rng.randint(90, 200)
+    frame = PilImage.new('RGBA', size, (grey, grey, grey, 255))
+    x = rng.randint(0, max(0, size[0] - code.size[0]))
+    y = rng.randint(0, max(0, size[1] - code.size[1]))
+    frame.paste(code, (x, y), code)
+
+    blur = rng.uniform(0, 1.5)
+    if blur > 0.2:
+        frame = frame.filter(ImageFilter.GaussianBlur(blur))
+    arr = np.asarray(frame).astype(np.int16)
+    noise = rng.randint(0, 20)
+    if noise:
+        arr[..., :3] += np.random.default_rng(rng.randint(0, 2**31)).integers(-noise, noise + 1, arr[..., :3].shape, dtype=np.int16)
+    return PilImage.fromarray(np.clip(arr, 0, 255).astype(np.uint8), 'RGBA')
+
+
+def cmd_synth(args):
+    rng = random.Random(args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    for i in range(args.count):
+        data = f"https://asset.example.com/{i:05d}/" + 'x' * rng.randint(0, 120)
+        synth_frame(data, rng, (args.width, args.height)).convert('RGB').save(os.path.join(args.out, f"synth_{i:05d}.png"))
+    print(f"Wrote {args.count} frames to {args.out}")
+    return 0
+
+
+def cmd_replay(args):
+    if not scanner.HAS_SCANNER:
+        print("Scanner dependencies (numpy, cv2) are not installed", file=sys.stderr)
+        return 1
+    if args.allocs:
+        tracemalloc.start()
+    # Load up front so disk and video decode stay out of the timings
+    frames = list(load_frames(args.source, args.limit))
+    result = replay(frames, args.engine, args.allocs, args.multi)
+    result['engine'] = args.engine
+    result['multi'] = args.multi
+    result['source'] = args.source
+
+    print(f"{result['frames']} frames  {result['fps']:.1f} fps  "
+          f"decoded {100 * result['success_rate']:.1f}%")
+    print(f"latency p50 {result['p50_ms']:.2f} ms  p90 {result['p90_ms']:.2f} ms  "
+          f"p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.2f} ms")
+    if args.allocs:
+        print(f"allocations {result['alloc_kb_per_frame']:.1f} KB/frame")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+def compare_engines(frames, names):
+    results = {}
+    for name in names:
+        engine = scanner.ENGINES[name]()
+        times = []
+        decoded = 0
+        for _, gray in frames:
+            start = time.perf_counter()
+            symbols = engine.decode(gray, thorough=True)
+            times.append(time.perf_counter() - start)
+            decoded += bool(symbols)
+        times.sort()
+        results[name] = {
+            'frames': len(frames),
+            'decoded': decoded,
+            'success_rate': decoded / len(frames) if frames else 0.0,
+            'mean_ms': 1000 * sum(times) / len(times) if times else 0.0,
+            'p50_ms': 1000 * times[len(times) // 2] if times else 0.0,
+        }
+    return results
+
+
+def cmd_engines(args):
+    names = args.engines.split(',') if args.engines else scanner.available_engines()
+    missing = [n for n in names if n not in scanner.ENGINES or not scanner.ENGINES[n].available()]
+    if missing:
+        print(f"Engine not available: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    frames = list(load_corpus(args.corpus))
+    results = compare_engines(frames, names)
+    for name, r in results.items():
+        print(f"{name:8s} {r['decoded']:5d}/{r['frames']:<5d} ({100 * r['success_rate']:5.1f}%)  "
+              f"mean {r['mean_ms']:7.2f} ms  p50 {r['p50_ms']:7.2f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline scanner benchmarks.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('replay', help="replay frames through the scanner's decode path")
+    p.add_argument('source', help="directory of images or a video file")
+    p.add_argument('--engine', default='auto')
+    # Matches ScannerScreen.multi_scan; --single replays the first-code-only path
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument('--multi', dest='multi', action='store_true', default=True,
+                      help="track and report every code in the frame (default, as in the app)")
+    mode.add_argument('--single', dest='multi', action='store_false',
+                      help="stop at the first code found")
+    p.add_argument('--limit', type=int, default=None, help="stop after this many frames")
+    p.add_argument('--allocs', action='store_true', help="also measure allocations per frame (slower)")
+    p.add_argument('--json', help="write results to this file")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser('synth', help="render a synthetic corpus of degraded camera frames")
+    p.add_argument('out', help="output directory")
+    p.add_argument('--count', type=int, default=100)
+    p.add_argument('--width', type=int, default=640)
+    p.add_argument('--height', type=int, default=480)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=cmd_synth)
+
+    p = sub.add_parser('engines', help="compare scan engines on a directory of frames")
+    p.add_argument('corpus', help="directory of images")
+    p.add_argument('--engines', help="comma-separated engine names (default: all available)")
+    p.add_argument('--json', help="write results to this file")
+    p.set_defaults(func=cmd_engines)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Content-addressed cache of rendered QR codes.
+
+Entries are keyed on a hash of the RenderOptions (plus the logo's mtime) and
+hold the rendered RGBA image. PNG bytes are only produced on demand (saving,
+disk tier) via ensure_png. The UI can attach a texture to an entry so a hit
+skips the whole render pipeline and the upload as well. Kept free of Kivy
+imports; textures are stored as opaque objects.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import astuple
+
+from PIL import Image as PilImage
+
+from perf import metrics
+from renderer import encode_png
+
+# Bump when the pipeline output changes so stale disk entries are ignored
+RENDER_VERSION = 1
+
+
+def cache_key(options):
+    try:
+        logo_mtime = os.stat(options.logo_path).st_mtime_ns if options.logo_path else 0
+    except OSError:
+        logo_mtime = 0
+    raw = repr((RENDER_VERSION, astuple(options), logo_mtime))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class CacheEntry:
+    __slots__ = ('key', 'image', 'png', 'texture')
+
+    def __init__(self, key, image=None, png=None):
+        self.key = key
+        self.image = image
+        self.png = png
+        self.texture = None
+
+    @property
+    def size(self):
+        return self.get_image().size
+
+    def get_image(self):
+        # Disk hits only carry PNG bytes; decode them on first use
+        if self.image is None:
+            img = PilImage.open(io.BytesIO(self.png))
+            self.image = img.convert('RGBA')
+        return self.image
+
+    @property
+    def nbytes(self):
+        n = len(self.png) if self.png is not None else 0
+        if self.image is not None:
+            w, h = self.image.size
+            n += w * h * 4
+            if self.texture is not None:
+                n += w * h * 4
+        return n
+
+
+class RenderCache:
+    """LRU of rendered codes bounded by ``max_bytes``, with an optional disk tier.
+
+    The disk tier is an LRU of its own, capped at ``disk_max_bytes``. Its
+    index is built from one directory scan on startup, ordered by mtime; hits
+    touch the file so the order survives restarts.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, disk_dir=None, disk_max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_index = OrderedDict()  # key -> file size, oldest first
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    @property
+    def disk_nbytes(self):
+        return self._disk_bytes
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        png = self._read_disk(key)
+        if png is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        entry = CacheEntry(key, png=png)
+        entry.get_image()  # decode before insert so the budget sees it
+        return self._insert(entry)
+
+    def peek(self, key):
+        """Return the in-memory entry for ``key`` without touching LRU order, stats or disk."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, image):
+        return self._insert(CacheEntry(key, image=image))
+
+    def ensure_png(self, entry):
+        """Encode the entry's PNG if needed and return it. Safe off the UI thread."""
+        if entry.png is None:
+            png = encode_png(entry.get_image())
+            self._update(entry, 'png', png)
+            self._write_disk(entry.key, png)
+        return entry.png
+
+    def attach_texture(self, entry, texture):
+        entry.get_image()
+        self._update(entry, 'texture', texture)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # --- Internals ---
+    def _update(self, entry, attr, value):
+        with self._lock:
+            tracked = self._entries.get(entry.key) is entry
+            if tracked:
+                self._bytes -= entry.nbytes
+            setattr(entry, attr, value)
+            if tracked:
+                self._bytes += entry.nbytes
+                self._evict()
+
+    def _insert(self, entry):
+        with self._lock:
+            old = self._entries.pop(entry.key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[entry.key] = entry
+            self._bytes += entry.nbytes
+            self._evict()
+        return entry
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.png")
+
+    def _scan_disk(self):
+        files = []
+        for item in os.scandir(self.disk_dir):
+            if item.name.endswith('.png') and item.is_file():
+                st = item.stat()
+                files.append((st.st_mtime, item.name[:-4], st.st_size))
+        files.sort()
+        for _, key, size in files:
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+        try:
+            # mtime is the LRU clock across restarts (atime is often disabled)
+            os.utime(path)
+        except OSError:
+            pass
+        return png
+
+    def _write_disk(self, key, png):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(png)
+            os.replace(tmp, path)
+        except OSError as e:
+            metrics.error("Cache write", e)
+            return
+        with self._lock:
+            self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(png)
+            self._disk_bytes += len(png)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        while True:
+            with self._lock:
+                # Keep the newest file even if it alone is over budget
+                if self._disk_bytes <= self.disk_max_bytes or len(self._disk_index) <= 1:
+                    return
+                key, size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= size
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+            metrics.incr('cache.disk_evicted')
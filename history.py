@@ -0,0 +1,75 @@
+"""Bounded, append-only scan history backed by SQLite."""
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from perf import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_payload ON scans (payload);
+"""
+
+
+class ScanHistory:
+    """Append scans with timestamps; the oldest rows roll off past ``max_rows``."""
+
+    def __init__(self, path, max_rows=10000):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        # One writer thread keeps INSERT + commit on slow flash off the UI thread
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scan-history')
+
+    def add(self, payloads, now=None):
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO scans (payload, scanned_at) VALUES (?, ?)",
+                [(p, now) for p in payloads],
+            )
+            # ids only grow, so everything below the newest max_rows can go
+            self._conn.execute(
+                "DELETE FROM scans WHERE id <= (SELECT MAX(id) FROM scans) - ?",
+                (self.max_rows,),
+            )
+
+    def add_async(self, payloads):
+        """Queue ``add`` on the writer thread, stamped now; returns its Future."""
+        future = self._writer.submit(self.add, list(payloads), time.time())
+        future.add_done_callback(self._report)
+        return future
+
+    @staticmethod
+    def _report(future):
+        if not future.cancelled() and future.exception() is not None:
+            metrics.error("Scan history", future.exception())
+
+    def recent(self, limit=50):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT payload, scanned_at FROM scans ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def lookup(self, payload):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT scanned_at FROM scans WHERE payload = ? ORDER BY id DESC", (payload,)
+            ).fetchall()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+
+    def close(self):
+        # Let queued writes land before the connection goes
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
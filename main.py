@@ -1,96 +1,101 @@
+import time
+# Startup clock, read once the first frame is on screen
+_START = time.perf_counter()
+
 from kivy.app import App
 from kivy.lang import Builder
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.floatlayout import FloatLayout
-from kivy.uix.anchorlayout import AnchorLayout
-from kivy.uix.image import Image
-from kivy.uix.textinput import TextInput
-from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.widget import Widget
 from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition
 from kivy.core.window import Window
-from kivy.utils import get_color_from_hex
-from kivy.graphics import Color, Ellipse, Rectangle, Line, RoundedRectangle, SmoothLine
+from kivy.graphics import Color, Ellipse
 from kivy.clock import Clock
 from kivy.animation import Animation
-from kivy.metrics import dp
-from kivy.properties import ListProperty, StringProperty, NumericProperty, ObjectProperty
-from kivy.uix.camera import Camera
-import qrcode
+from kivy.properties import NumericProperty, ObjectProperty, StringProperty
+from kivy.graphics.texture import Texture
 import os
+import threading
 import random
-from PIL import Image as PilImage, ImageDraw, ImageFont
+from array import array
 from kivy.utils import platform
+from workers import LatestOnlyExecutor, LatestFrameWorker
+from perf import metrics
+from scheduler import scheduler
+import theme as themes
 
-# Optional Scanning Dependencies (Desktop Only)
-try:
-    from pyzbar.pyzbar import decode
-    import numpy as np
-    import cv2
-    HAS_SCANNER = True
-except ImportError:
-    HAS_SCANNER = False
+# Deferred until needed (see QRCodeApp.get_render_cache / show_scanner):
+# renderer/cache pull in qrcode + PIL, scanner pulls in numpy, cv2 and pyzbar,
+# and the KV Camera rule loads kivy.uix.camera and a camera provider.
 
 # Set a mobile-friendly size for desktop testing
 if platform not in ('android', 'ios'):
     Window.size = (400, 800)
 
-# --- THEMES ---
-THEMES = {
-    'CYBER_BLUE': {
-        'bg_top': '#050510', 'bg_bot': '#0f172a',
-        'accent': '#00f0ff', 'glow': '#00f0ff',
-        'input_bg': '#1e1b4b', 'fg': '#ffffff'
-    },
-    'NEON_PINK': {
-        'bg_top': '#1a0510', 'bg_bot': '#2a0f1b',
-        'accent': '#d946ef', 'glow': '#d946ef',
-        'input_bg': '#380e28', 'fg': '#ffffff'
-    },
-    'TOXIC_GREEN': {
-        'bg_top': '#051a05', 'bg_bot': '#0f2a0f',
-        'accent': '#39ff14', 'glow': '#39ff14',
-        'input_bg': '#0e280e', 'fg': '#ffffff'
-    },
-    'GOLD_MATRIX': {
-        'bg_top': '#000000', 'bg_bot': '#0a0a0a',
-        'accent': '#ffd700', 'glow': '#ffd700',
-        'input_bg': '#1c1c1c', 'fg': '#ffffff'
-    }
-}
-
 class ParticleWidget(Widget):
+    count = 30
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.particles = []
-        Clock.schedule_interval(self.update_particles, 1.0 / 60.0)
+        # Retained mode: instructions are built once, each frame only moves them.
+        # Particle state lives in flat float arrays instead of per-particle dicts.
+        n = self.count
+        self.xs = array('f', (random.uniform(0, 400) for _ in range(n)))
+        self.ys = array('f', (random.uniform(0, 800) for _ in range(n)))
+        self.vys = array('f', (random.uniform(0.5, 2.0) for _ in range(n)))
+        self.ellipses = []
+        with self.canvas:
+            for i in range(n):
+                size = random.randint(2, 5)
+                Color(0.5, 0.8, 1, random.uniform(0.1, 0.5))
+                self.ellipses.append(Ellipse(pos=(self.xs[i], self.ys[i]), size=(size, size), segments=12))
+        self.bind(size=self.scatter)
+
+    def scatter(self, *args):
+        for i in range(self.count):
+            self.xs[i] = random.uniform(0, self.width)
+            self.ys[i] = random.uniform(0, self.height)
 
     def update_particles(self, dt):
-        with self.canvas:
-            self.canvas.clear()
-            # Draw bg
-            Color(rgba=get_color_from_hex('#00000000')) # Transparent base
-            
-            # Spawn logic
-            if len(self.particles) < 30:
-                self.particles.append({
-                    'x': random.randint(0, int(self.width or 400)),
-                    'y': random.randint(0, int(self.height or 800)),
-                    'vy': random.uniform(0.5, 2.0),
-                    'size': random.randint(2, 5),
-                    'alpha': random.uniform(0.1, 0.5)
-                })
-
-            for p in self.particles:
-                p['y'] += p['vy']
-                if p['y'] > self.height:
-                    p['y'] = 0
-                    p['x'] = random.randint(0, int(self.width))
-                
-                # Draw
-                Color(0.5, 0.8, 1, p['alpha'])
-                Ellipse(pos=(p['x'], p['y']), size=(p['size'], p['size']))
+        with metrics.timer('particles'):
+            xs, ys, vys = self.xs, self.ys, self.vys
+            ox, oy, w, h = self.x, self.y, self.width, self.height
+            for i, ellipse in enumerate(self.ellipses):
+                y = ys[i] + vys[i]
+                if y > h:
+                    y = 0
+                    xs[i] = random.uniform(0, w)
+                ys[i] = y
+                ellipse.pos = (ox + xs[i], oy + y)
+
+class PerfOverlay(Label):
+    """Corner readout of the perf metrics, refreshed twice a second."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        scheduler.add_interval(None, 'perf_overlay', self.refresh, rate=2)
+
+    def stop(self):
+        scheduler.remove(None, 'perf_overlay')
+
+    def refresh(self, dt):
+        def ms(name):
+            value = metrics.percentile(name, 50)
+            return f"{1000 * value:5.1f}" if value is not None else "  -  "
+        self.text = (
+            f"FPS {Clock.get_fps():5.1f}\n"
+            f"gen p50 {ms('generate')} ms\n"
+            f"decode p50 {ms('decode')} ms\n"
+            f"particles p50 {ms('particles')} ms\n"
+            f"dropped {metrics.count('qr-decode.dropped')}  "
+            f"errors {sum(v for k, v in metrics.snapshot()['counters'].items() if k.startswith('errors.'))}"
+        )
+
+def image_to_texture(img):
+    # Upload the RGBA buffer straight to the GPU, no PNG round-trip
+    texture = Texture.create(size=img.size, colorfmt='rgba')
+    texture.blit_buffer(img.tobytes(), colorfmt='rgba', bufferfmt='ubyte')
+    texture.flip_vertical()
+    return texture
 
 class ScanningLaser(Widget):
     laser_y = NumericProperty(0)
@@ -99,24 +104,43 @@ class ScanningLaser(Widget):
         super().__init__(**kwargs)
         self.opacity = 0
     
-    def scan(self, target_widget):
-        self.opacity = 1
+    def make_scan(self, target_widget):
         self.width = target_widget.width
         self.x = target_widget.x
         
-        anim = Animation(y=target_widget.top, duration=0) + \
+        return Animation(y=target_widget.top, opacity=1, duration=0) + \
                Animation(y=target_widget.y, duration=0.8) + \
                Animation(y=target_widget.top, duration=0.8) + \
                Animation(opacity=0, duration=0.2)
-        anim.start(self)
+
+    def scan(self, target_widget):
+        self.make_scan(target_widget).start(self)
 
 KV = """
 #:import get_color_from_hex kivy.utils.get_color_from_hex
+# Theme colors are pre-parsed RGBA lists on app.theme (see theme.py)
+#:set SAVE_GREEN get_color_from_hex('#10b981')
 
 <ParticleWidget>:
     canvas:
         # Drawn in python
 
+<PerfOverlay>:
+    size_hint: None, None
+    size: 220, 110
+    pos: 10, 10
+    font_size: '11sp'
+    halign: 'left'
+    valign: 'top'
+    text_size: self.width - 12, self.height - 12
+    color: 0.6, 1, 0.6, 1
+    canvas.before:
+        Color:
+            rgba: 0, 0, 0, 0.7
+        Rectangle:
+            pos: self.pos
+            size: self.size
+
 <ScanningLaser>:
     canvas:
         Color:
@@ -146,12 +170,10 @@ KV = """
 
 <GeneratorScreen>:
     name: 'generator'
-    bg_color: '#050510'
-    accent_color: '#00f0ff'
     
     canvas.before:
         Color:
-            rgba: get_color_from_hex(self.bg_color)
+            rgba: app.theme.bg_top
         Rectangle:
             pos: self.pos
             size: self.size
@@ -175,11 +197,11 @@ KV = """
                 size_hint_x: None
                 width: 100
                 background_color: 0,0,0,0
-                color: get_color_from_hex(root.accent_color)
-                on_release: app.root.current = 'scanner'
+                color: app.theme.accent
+                on_release: app.show_scanner()
                 canvas.before:
                     Color:
-                        rgba: get_color_from_hex(root.accent_color)
+                        rgba: app.theme.accent
                     Line:
                         rounded_rectangle: (self.x, self.y, self.width, self.height, 10)
                         width: 1
@@ -190,25 +212,27 @@ KV = """
                 size_hint_x: None
                 width: 100
                 background_color: 0,0,0,0
-                color: get_color_from_hex(root.accent_color)
+                color: app.theme.accent
                 on_release: root.cycle_theme()
                 canvas.before:
                     Color:
-                        rgba: get_color_from_hex(root.accent_color)
+                        rgba: app.theme.accent
                     Line:
                         rounded_rectangle: (self.x, self.y, self.width, self.height, 10)
                         width: 1
         
         Label:
             text: "Dhanvanth QR Code"
+            # Hidden gesture: triple-tap the title to toggle the perf overlay
+            on_touch_down: if self.collide_point(*args[1].pos) and args[1].is_triple_tap: app.toggle_perf()
             font_size: '28sp'
             bold: True
-            color: get_color_from_hex(root.accent_color)
+            color: app.theme.accent
             size_hint_y: None
             height: 50
             canvas.before:
                 Color:
-                    rgba: get_color_from_hex(root.accent_color)
+                    rgba: app.theme.accent
                 Line:
                     points: [self.center_x - 30, self.y, self.center_x + 30, self.y]
                     width: 2
@@ -223,22 +247,23 @@ KV = """
             TextInput:
                 id: input_text
                 hint_text: "Enter Text or URL...."
+                on_text: root.schedule_preview()
                 size_hint_y: 1
                 font_size: '16sp'
                 background_color: 0,0,0,0
                 foreground_color: 1,1,1,1
-                cursor_color: get_color_from_hex(root.accent_color)
+                cursor_color: app.theme.accent
                 multiline: False
                 padding: [15, 15]
                 canvas.before:
                     Color:
-                        rgba: get_color_from_hex('#1e1b4b')
+                        rgba: app.theme.input_bg
                     RoundedRectangle:
                         pos: self.pos
                         size: self.size
                         radius: [10]
                     Color:
-                        rgba: get_color_from_hex(root.accent_color)
+                        rgba: app.theme.accent
                     Line:
                         rounded_rectangle: (self.x, self.y, self.width, self.height, 10)
                         width: 1
@@ -246,22 +271,23 @@ KV = """
             TextInput:
                 id: input_caption
                 hint_text: "Caption (Optional)...."
+                on_text: root.schedule_preview()
                 size_hint_y: 1
                 font_size: '16sp'
                 background_color: 0,0,0,0
                 foreground_color: 1,1,1,1
-                cursor_color: get_color_from_hex(root.accent_color)
+                cursor_color: app.theme.accent
                 multiline: False
                 padding: [15, 15]
                 canvas.before:
                     Color:
-                        rgba: get_color_from_hex('#1e1b4b')
+                        rgba: app.theme.input_bg
                     RoundedRectangle:
                         pos: self.pos
                         size: self.size
                         radius: [10]
                     Color:
-                        rgba: get_color_from_hex(root.accent_color)
+                        rgba: app.theme.accent
                     Line:
                         rounded_rectangle: (self.x, self.y, self.width, self.height, 10)
                         width: 1
@@ -277,7 +303,7 @@ KV = """
             on_release: root.generate_qr()
             canvas.before:
                 Color:
-                    rgba: get_color_from_hex(root.accent_color)
+                    rgba: app.theme.accent
                 RoundedRectangle:
                     pos: self.pos
                     size: self.size
@@ -302,32 +328,57 @@ KV = """
                 height: 2
                 opacity: 0
 
-        Button:
-            id: save_btn
-            text: "DOWNLOAD"
+        BoxLayout:
             size_hint_y: None
-            height: 0
-            opacity: 0
-            disabled: True
-            background_color: 0,0,0,0
-            color: get_color_from_hex('#ffffff')
-            on_release: root.save_qr()
-            canvas.before:
-                Color:
-                    rgba: get_color_from_hex('#10b981')
-                RoundedRectangle:
-                    pos: self.pos
-                    size: self.size
-                    radius: [30]
+            height: save_btn.height
+            spacing: 10
+
+            Button:
+                id: save_btn
+                text: "DOWNLOAD"
+                size_hint_y: None
+                height: 0
+                opacity: 0
+                disabled: True
+                background_color: 0,0,0,0
+                color: app.theme.fg
+                on_release: root.save_qr()
+                canvas.before:
+                    Color:
+                        rgba: SAVE_GREEN
+                    RoundedRectangle:
+                        pos: self.pos
+                        size: self.size
+                        radius: [30]
 
+            # Output format for DOWNLOAD; tap to cycle
+            Button:
+                id: format_btn
+                text: root.export_label
+                size_hint_x: None
+                width: 90
+                opacity: save_btn.opacity
+                disabled: save_btn.height == 0
+                background_color: 0,0,0,0
+                color: app.theme.accent
+                bold: True
+                on_release: root.cycle_export_format()
+                canvas.before:
+                    Color:
+                        rgba: app.theme.accent
+                    Line:
+                        rounded_rectangle: (self.x, self.y, self.width, self.height, 20)
+                        width: 1
+
+"""
+
+SCANNER_KV = """
 <ScannerScreen>:
     name: 'scanner'
-    bg_color: '#050510'
-    accent_color: '#00f0ff'
     
     canvas.before:
         Color:
-            rgba: get_color_from_hex(self.bg_color)
+            rgba: app.theme.bg_top
         Rectangle:
             pos: self.pos
             size: self.size
@@ -353,7 +404,7 @@ KV = """
                 size_hint_x: None
                 width: 80
                 background_color: 0,0,0,0
-                color: get_color_from_hex(root.accent_color)
+                color: app.theme.accent
                 on_release: 
                     app.root.current = 'generator'
                     root.stop_camera()
@@ -361,7 +412,7 @@ KV = """
             Label:
                 text: "SCANNER"
                 bold: True
-                color: get_color_from_hex(root.accent_color)
+                color: app.theme.accent
         
         # Camera Area
         FloatLayout:
@@ -416,7 +467,7 @@ KV = """
                 on_release: root.toggle_scan()
                 canvas.before:
                     Color:
-                        rgba: get_color_from_hex(root.accent_color)
+                        rgba: app.theme.accent
                     RoundedRectangle:
                         pos: self.pos
                         size: self.size
@@ -425,19 +476,34 @@ KV = """
 """
 
 class GeneratorScreen(Screen):
-    bg_color = StringProperty('#050510')
-    accent_color = StringProperty('#00f0ff')
-    current_theme_idx = 0
-    theme_names = list(THEMES.keys())
-    temp_path = StringProperty('')
+    current_entry = None
+    current_options = None
+    # Formats written on DOWNLOAD, any of png, svg, pdf; QR_EXPORT sets the default
+    export_choices = ('png', 'svg', 'pdf')
+    export_default = os.environ.get('QR_EXPORT', 'png')
+    export_formats = export_default.split(',')
+    export_label = StringProperty('+'.join(export_formats).upper())
+    # Re-render as the user types, once they pause for preview_delay seconds
+    live_preview = os.environ.get('QR_LIVE_PREVIEW', '1') != '0'
+    preview_delay = 0.15
+    _layers = None
+    _saver = None
+
+    def on_kv_post(self, base_widget):
+        scheduler.add_interval(self, 'particles', self.ids.particles.update_particles, rate=60)
+        self._preview_trigger = Clock.create_trigger(self._preview, self.preview_delay)
+
+    def on_enter(self):
+        scheduler.show(self)
+
+    def on_leave(self):
+        # Nothing to animate while the generator is off screen
+        scheduler.hide(self)
 
     def cycle_theme(self):
-        self.current_theme_idx = (self.current_theme_idx + 1) % len(self.theme_names)
-        t_name = self.theme_names[self.current_theme_idx]
-        theme = THEMES[t_name]
-        
-        self.bg_color = theme['bg_top']
-        self.accent_color = theme['accent']
+        # Tweens the shared palette; every KV rule bound to app.theme follows
+        theme = App.get_running_app().theme
+        theme.apply(theme.next_name())
 
     def generate_qr(self):
         text = self.ids.input_text.text.strip()
@@ -449,80 +515,108 @@ class GeneratorScreen(Screen):
             anim.start(self.ids.input_text)
             return
 
-        try:
-            # Generate QR
-            qr = qrcode.QRCode(version=1, box_size=10, border=1)
-            qr.add_data(text)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="#101010", back_color="white").convert('RGBA')
+        self._preview_trigger.cancel()
+        self._submit_render(text, caption, self.show_qr)
 
-            # --- Icon Logic (Rounded) ---
-            try:
-                if os.path.exists('icon.png'):
-                    logo = PilImage.open('icon.png').convert("RGBA")
-                    basewidth = int(img.size[0] * 0.22)
-                    wpercent = (basewidth / float(logo.size[0]))
-                    hsize = int((float(logo.size[1]) * float(wpercent)))
-                    logo = logo.resize((basewidth, hsize), PilImage.Resampling.LANCZOS)
-                    
-                    mask = PilImage.new('L', logo.size, 0)
-                    draw = ImageDraw.Draw(mask)
-                    radius = int(min(logo.size) * 0.3) 
-                    draw.rounded_rectangle([(0, 0), logo.size], radius=radius, fill=255)
-                    
-                    rounded_logo = PilImage.new('RGBA', logo.size, (0, 0, 0, 0))
-                    rounded_logo.paste(logo, (0, 0), mask=mask)
-                    
-                    pos_x = (img.size[0] - logo.size[0]) // 2
-                    pos_y = (img.size[1] - logo.size[1]) // 2
-                    img.paste(rounded_logo, (pos_x, pos_y), rounded_logo)
-            except Exception as e:
-                print(f"Icon error: {e}")
-
-            # --- Caption Logic ---
-            if caption:
-                # Add extra space at bottom for caption
-                # Approximate font size based on image width
-                font_size = int(img.size[0] * 0.08)
-                extra_height = font_size + 20
-                
-                new_img = PilImage.new("RGBA", (img.size[0], img.size[1] + extra_height), "white")
-                new_img.paste(img, (0, 0))
-                
-                draw = ImageDraw.Draw(new_img)
-                # Try to load a font, fallback to default
-                try:
-                    font_path = "arial.ttf"
-                    if platform == 'android':
-                        font_path = "/system/fonts/Roboto-Regular.ttf"
-                    font = ImageFont.truetype(font_path, font_size)
-                except Exception as e:
-                    print(f"Font load failed: {e}")
-                    font = ImageFont.load_default()
-                
-                # Center text
-                try:
-                    # Pillow 10+
-                    left, top, right, bottom = draw.textbbox((0,0), caption, font=font)
-                    text_w = right - left
-                    text_h = bottom - top
-                except AttributeError:
-                    # Older Pillow
-                    text_w, text_h = draw.textsize(caption, font=font)
-
-                draw.text(((new_img.size[0] - text_w) / 2, img.size[1] + 5), caption, fill="black", font=font)
-                img = new_img
-
-            self.temp_path = os.path.abspath("temp_qr.png")
-            img.save(self.temp_path)
+    # --- Live Preview ---
+    def schedule_preview(self):
+        if not self.live_preview:
+            return
+        # Restart the countdown on every keystroke
+        self._preview_trigger.cancel()
+        self._preview_trigger()
+
+    def _preview(self, dt):
+        text = self.ids.input_text.text.strip()
+        if not text:
+            App.get_running_app().render_executor.cancel()
+            self.clear_preview()
+            return
+        self._submit_render(text, self.ids.input_caption.text.strip(), self.show_preview, preview=True)
+
+    def clear_preview(self):
+        # The code on screen no longer matches the input: hide it and stop DOWNLOAD saving it
+        self.current_entry = None
+        self.current_options = None
+        scheduler.remove(self, 'laser')
+        self.ids.laser.opacity = 0
+        qr_img = self.ids.qr_image
+        Animation.cancel_all(qr_img)
+        Animation(opacity=0, duration=0.2).start(qr_img)
+        save = self.ids.save_btn
+        save.disabled = True
+        Animation.cancel_all(save)
+        Animation(height=0, opacity=0, duration=0.2).start(save)
+
+    def show_preview(self, result):
+        if self.current_entry is None or self.ids.qr_image.opacity == 0:
+            # First preview gets the full reveal
+            self.show_qr(result, keep=False)
+            return
+        entry, options = result
+        try:
+            self.ids.qr_image.texture = self._entry_texture(entry, keep=False)
+            self.current_entry = entry
+            self.current_options = options
+        except Exception as e:
+            metrics.error("Preview", e)
+
+    # --- Rendering ---
+    def _submit_render(self, text, caption, on_done, preview=False):
+        from renderer import RenderOptions
+        options = RenderOptions(data=text, caption=caption)
+        # Supersedes any render still queued or running
+        App.get_running_app().render_executor.submit(
+            self._render_worker, options, preview,
+            on_done=on_done,
+            on_error=lambda e: metrics.error("Generation", e),
+        )
+
+    def _render_worker(self, options, preview=False):
+        # Runs on the render executor: everything except the GL upload.
+        # Live previews only read the cache; each keystroke's render stays out
+        # of it so typing a URL doesn't flush the kiosk's working set.
+        from cache import CacheEntry, cache_key
+        app = App.get_running_app()
+        with metrics.timer('generate'):
+            cache = app.get_render_cache()
+            key = cache_key(options)
+            entry = cache.peek(key) if preview else cache.get(key)
+            if entry is None:
+                metrics.incr('cache.miss')
+                if self._layers is None:
+                    from renderer import LayeredRenderer
+                    self._layers = LayeredRenderer()
+                img = self._layers.render(options, cancelled=app.render_executor.cancelled)
+                if img is None:
+                    # Superseded by a newer keystroke; the result would be dropped anyway
+                    return None
+                entry = CacheEntry(key, image=img) if preview else cache.put(key, img)
+            else:
+                metrics.incr('cache.hit')
+            return entry, options
+
+    def _entry_texture(self, entry, keep=True):
+        texture = entry.texture
+        if texture is None:
+            texture = image_to_texture(entry.get_image())
+            if keep:
+                App.get_running_app().get_render_cache().attach_texture(entry, texture)
+        return texture
+
+    def show_qr(self, result, keep=True):
+        entry, options = result
+        try:
+            texture = self._entry_texture(entry, keep)
+            self.current_entry = entry
+            self.current_options = options
             
             # Reveal Animation
             qr_img = self.ids.qr_image
-            qr_img.source = self.temp_path
-            qr_img.reload()
+            qr_img.texture = texture
             
             # Reset state for anim
+            Animation.cancel_all(qr_img)
             qr_img.opacity = 0
             qr_img.size_hint = (None, None)
             qr_img.size = (0, 0)
@@ -532,79 +626,166 @@ class GeneratorScreen(Screen):
             anim.start(qr_img)
             
             # Laser Scan
-            self.ids.laser.scan(qr_img)
+            laser = self.ids.laser
+            scheduler.run_animation(self, 'laser', laser.make_scan(qr_img), laser)
             
             # Show Save
             save = self.ids.save_btn
-            if save.height == 0:
+            if save.height < 60:
+                # Also catches a hide from clear_preview still in flight
+                Animation.cancel_all(save)
                 anim_s = Animation(height=60, opacity=1, duration=0.5)
                 anim_s.start(save)
                 save.disabled = False
 
         except Exception as e:
-            print(f"Generation error: {e}")
+            metrics.error("Generation", e)
 
     def save_qr(self):
-        try:
+        if self.current_entry is None:
+            return
+        self.ids.save_btn.disabled = True
+        cache = App.get_running_app().get_render_cache()
+        if cache.peek(self.current_entry.key) is not self.current_entry:
+            # A live preview result: cache it now that it is worth keeping
+            self.current_entry = cache.put(self.current_entry.key, self.current_entry.get_image())
+        entry, options = self.current_entry, self.current_options
+        outputs = []
+        for fmt in self.export_formats:
+            if fmt == 'png':
+                outputs.append(('png', lambda: cache.ensure_png(entry)))
+            else:
+                # Vector output is resolution independent, render it from the options
+                outputs.append((fmt, lambda fmt=fmt: self._export(fmt, options)))
+        # Encode + write happen on the save queue; the button hears back through the clock
+        self._get_saver().submit(
+            outputs,
+            on_done=lambda paths: self._on_saved("SAVED!"),
+            on_error=self._on_save_error,
+        )
+
+    def cycle_export_format(self):
+        current = ','.join(self.export_formats)
+        choices = list(self.export_choices)
+        if self.export_default not in choices:
+            # Keep a combined QR_EXPORT default (e.g. png,pdf) in the cycle
+            choices.insert(0, self.export_default)
+        fmt = choices[(choices.index(current) + 1) % len(choices)]
+        self.export_formats = fmt.split(',')
+        self.export_label = '+'.join(self.export_formats).upper()
+
+    def _get_saver(self):
+        if self._saver is None:
+            from saver import SaveQueue
             if platform == 'android':
                 from android.storage import primary_external_storage_path
-                from shutil import copyfile
-                dir_path = os.path.join(primary_external_storage_path(), 'DCIM', 'Dhanvanth QR')
-                if not os.path.exists(dir_path): os.makedirs(dir_path)
-                filename = f"QR_{len(os.listdir(dir_path)) + 1}.png"
-                copyfile(self.temp_path, os.path.join(dir_path, filename))
+                self._saver = SaveQueue(os.path.join(primary_external_storage_path(), 'DCIM', 'Dhanvanth QR'), 'QR_', deliver=schedule_on_clock)
             else:
-                import shutil
-                shutil.copy(self.temp_path, f"Saved_QR_{random.randint(100,999)}.png")
-            
-            self.ids.save_btn.text = "SAVED!"
-            Clock.schedule_once(lambda dt: setattr(self.ids.save_btn, 'text', "DOWNLOAD"), 2)
-        except Exception as e:
-            self.ids.save_btn.text = "ERROR"
-            print(f"Save error: {e}")
+                self._saver = SaveQueue(os.getcwd(), 'Saved_QR_', deliver=schedule_on_clock)
+        return self._saver
+
+    @staticmethod
+    def _export(fmt, options):
+        from vector import EXPORTERS
+        return EXPORTERS[fmt](options)
+
+    def _on_save_error(self, e):
+        metrics.error("Save", e)
+        self._on_saved("ERROR")
+
+    def _on_saved(self, text):
+        save = self.ids.save_btn
+        save.text = text
+        save.disabled = False
+        Clock.schedule_once(lambda dt: setattr(save, 'text', "DOWNLOAD"), 2)
 
 class ScannerScreen(Screen):
-    bg_color = StringProperty('#050510')
-    accent_color = StringProperty('#00f0ff')
     is_scanning = False
+    # Report every code in the frame instead of just the first
+    multi_scan = True
+    # 'auto', an engine name ('pyzbar', 'opencv', 'wechat') or a comma-separated chain
+    scan_engine = os.environ.get('QR_SCAN_ENGINE', 'auto')
     
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # First navigation to the scanner is what pays for numpy/cv2/pyzbar
+        from scanner import HAS_SCANNER, FrameDecoder, DedupWindow, ScanRateController
+        self.has_scanner = HAS_SCANNER
+
+        # Decoding runs off the main thread; only the newest frame is kept
+        self.decoder = None
+        if HAS_SCANNER:
+            try:
+                self.frame_decoder = FrameDecoder(self.scan_engine, multi=self.multi_scan)
+            except (ValueError, RuntimeError) as e:
+                # Unknown or missing engine in QR_SCAN_ENGINE: use the automatic chain
+                metrics.error("Scan engine", e)
+                self.frame_decoder = FrameDecoder('auto', multi=self.multi_scan)
+            self.decoder = LatestFrameWorker(
+                self._decode_frame, self.on_decoded,
+                deliver=schedule_on_clock, name='qr-decode')
+        self.dedup = DedupWindow(window=2.0)
+        self.found = []
+        self.scan_rate = ScanRateController()
+        self._new_frame = False
+        self._core_camera = None
+
+    def on_kv_post(self, base_widget):
+        cam = self.ids.camera
+        # Camera, polling and laser only run while scanning, on screen and not paused
+        scheduler.add_activity(self, 'camera',
+                               lambda: setattr(cam, 'play', True),
+                               lambda: setattr(cam, 'play', False), enabled=False)
+        scheduler.add_interval(self, 'detect', self.detect_qr, rate=30, enabled=False) # 30 FPS check
+        scheduler.add_animation(self, 'laser', self.make_laser_anim, self.ids.cam_laser, enabled=False)
+
     def on_enter(self):
         # Optional: Auto-start? No, user might prefer manual start
-        pass
+        scheduler.show(self)
         
     def on_leave(self):
         self.stop_camera()
+        scheduler.hide(self)
+
+    def make_laser_anim(self):
+        anim = Animation(y=self.ids.cam_container.y, duration=1.0) + \
+               Animation(y=self.ids.cam_container.top, duration=1.0)
+        anim.repeat = True
+        return anim
         
     def toggle_scan(self):
-        cam = self.ids.camera
         if not self.is_scanning:
             # Start
-            cam.play = True
             self.is_scanning = True
             self.ids.scan_toggle.text = "STOP SCAN"
             self.ids.result_label.text = "Scanning..."
-            Clock.schedule_interval(self.detect_qr, 1.0/30.0) # 30 FPS check
+            self.dedup.reset()
+            self.found = []
+            self.scan_rate.reset(time.perf_counter())
+            if self.decoder:
+                self.decoder.start()
             
             # Anim laser
             self.ids.cam_laser.opacity = 1
-            anim = Animation(y=self.ids.cam_container.y, duration=1.0) + \
-                   Animation(y=self.ids.cam_container.top, duration=1.0)
-            anim.repeat = True
-            anim.start(self.ids.cam_laser)
+            for name in ('camera', 'detect', 'laser'):
+                scheduler.enable(self, name)
+            self._watch_frames(True)
             
         else:
             self.stop_camera()
 
     def stop_camera(self):
-        self.ids.camera.play = False
         self.is_scanning = False
         self.ids.scan_toggle.text = "START SCAN"
-        Clock.unschedule(self.detect_qr)
-        Animation.cancel_all(self.ids.cam_laser)
+        for name in ('camera', 'detect', 'laser'):
+            scheduler.disable(self, name)
+        self._watch_frames(False)
+        if self.decoder:
+            self.decoder.stop()
         self.ids.cam_laser.opacity = 0
 
     def detect_qr(self, dt):
-        if not HAS_SCANNER:
+        if not self.has_scanner:
             self.ids.result_label.text = "Scanning not supported on Android (yet)"
             return
 
@@ -613,36 +794,78 @@ class ScannerScreen(Screen):
         if not cam.texture:
             return
 
-        # Get texture pixels
-        # texture.pixels is a byte buffer
-        # For pyzbar we need PIL image or raw bytes
-        
-        try:
-            # Kivy texture to buffer
-            w, h = cam.texture.size
-            pixels = cam.texture.pixels
-            
-            # Convert to PIL Image for easier debugging/compatibility
-            # Kivy default texture is RGBA
-            pil_image = PilImage.frombytes(mode='RGBA', size=(w, h), data=pixels)
-            
-            # Pyzbar requires list of decoded objects
-            decoded_objects = decode(pil_image)
-            
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                self.ids.result_label.text = f"FOUND: {data}"
-                # Optionally vibrate or verify
-                # Stop scanning if found?
-                # self.stop_camera()
-                return
+        # Poll as fast as decoding and the camera allow, idle down when nothing happens
+        saw_new_frame = self._new_frame or self._core_camera is None
+        self._new_frame = False
+        scheduler.set_rate(self, 'detect', self.scan_rate.next_rate(time.perf_counter(), saw_new_frame))
+        if not saw_new_frame:
+            return
 
+        try:
+            # Kivy texture to buffer; pyzbar runs on the decode worker
+            with metrics.timer('frame.grab'):
+                w, h = cam.texture.size
+                self.decoder.offer((w, h, cam.texture.pixels))
         except Exception as e:
-            print(f"Scan Error: {e}")
+            metrics.error("Scan", e)
+
+    def _decode_frame(self, frame):
+        # Runs on the decode worker
+        start = time.perf_counter()
+        with metrics.timer('decode'):
+            payloads = self.frame_decoder(frame)
+        end = time.perf_counter()
+        self.scan_rate.decoded(end - start, payloads is not None, self.frame_decoder.motion, end)
+        return payloads
+
+    def _watch_frames(self, watch):
+        # The core camera fires on_texture once per delivered frame
+        if self._core_camera is not None:
+            self._core_camera.funbind('on_texture', self._on_camera_frame)
+            self._core_camera = None
+        core = getattr(self.ids.camera, '_camera', None)
+        if watch and core is not None:
+            core.fbind('on_texture', self._on_camera_frame)
+            self._core_camera = core
+
+    def _on_camera_frame(self, *args):
+        self._new_frame = True
+        self.scan_rate.frame_arrived(time.perf_counter())
+
+    def on_decoded(self, payloads):
+        if not self.multi_scan:
+            payloads = payloads[:1]
+        fresh = self.dedup.feed(payloads, Clock.get_time())
+        if not fresh:
+            return
+        App.get_running_app().scan_history.add_async(fresh)
+
+        # Newest first; keep the label to a few lines
+        self.found = (fresh + self.found)[:5]
+        if len(self.found) == 1:
+            self.ids.result_label.text = f"FOUND: {self.found[0]}"
+        else:
+            self.ids.result_label.text = "FOUND:\n" + "\n".join(self.found)
+
+def schedule_on_clock(fn):
+    Clock.schedule_once(lambda dt: fn())
 
 class QRCodeApp(App):
+    # Memory budget for rendered codes kept between generations
+    render_cache_bytes = 32 * 1024 * 1024
+    use_disk_cache = True
+    disk_cache_bytes = 64 * 1024 * 1024
+
+    render_cache = None
+    scan_history = None
+    startup_ms = None
+    # Active palette, bound from KV as app.theme.<key>
+    theme = ObjectProperty(themes.theme)
+
     def build(self):
         self.icon = 'icon.png'
+        self._render_lock = threading.Lock()
+        self.render_executor = LatestOnlyExecutor(deliver=schedule_on_clock, name='qr-render')
         
         if platform == 'android':
             from android.permissions import request_permissions, Permission
@@ -654,10 +877,80 @@ class QRCodeApp(App):
             
         Builder.load_string(KV)
         
+        # The scanner screen is built on first navigation (show_scanner)
         sm = ScreenManager(transition=FadeTransition())
         sm.add_widget(GeneratorScreen(name='generator'))
-        sm.add_widget(ScannerScreen(name='scanner'))
         return sm
 
+    def get_render_cache(self):
+        """Import the render stack and build the cache on first use (any thread)."""
+        with self._render_lock:
+            if self.render_cache is None:
+                from renderer import default_font_path
+                from cache import RenderCache
+                # Resolve the caption font once instead of on every generation
+                default_font_path()
+                disk_dir = os.path.join(self.user_data_dir, 'qr_cache') if self.use_disk_cache else None
+                self.render_cache = RenderCache(max_bytes=self.render_cache_bytes, disk_dir=disk_dir,
+                                                disk_max_bytes=self.disk_cache_bytes)
+            return self.render_cache
+
+    def show_scanner(self):
+        sm = self.root
+        if not sm.has_screen('scanner'):
+            with metrics.timer('startup.scanner'):
+                from history import ScanHistory
+                Builder.load_string(SCANNER_KV)
+                self.scan_history = ScanHistory(os.path.join(self.user_data_dir, 'scan_history.db'))
+                sm.add_widget(ScannerScreen(name='scanner'))
+        sm.current = 'scanner'
+
+    def _on_first_frame(self, dt):
+        self.startup_ms = 1000 * (time.perf_counter() - _START)
+        metrics.record('startup', self.startup_ms / 1000)
+        print(f"Startup: first frame after {self.startup_ms:.0f} ms")
+        # Warm the render stack in the background so the first INITIALIZE is fast
+        threading.Thread(target=self.get_render_cache, name='warm-up', daemon=True).start()
+
+    perf_overlay = None
+
+    def toggle_perf(self):
+        if self.perf_overlay is None:
+            metrics.enabled = True
+            self.perf_overlay = PerfOverlay()
+            Window.add_widget(self.perf_overlay)
+        else:
+            self.perf_overlay.stop()
+            Window.remove_widget(self.perf_overlay)
+            self.perf_overlay = None
+            print(f"Perf trace written to {self.dump_perf_trace()}")
+            metrics.enabled = False
+
+    def dump_perf_trace(self):
+        path = os.environ.get('QR_PERF_TRACE') or os.path.join(self.user_data_dir, 'perf_trace.json')
+        return metrics.dump_trace(path)
+
+    def on_start(self):
+        # First callback runs before frame 1 is drawn, the nested one right after it
+        Clock.schedule_once(lambda dt: Clock.schedule_once(self._on_first_frame))
+        if metrics.enabled:
+            self.perf_overlay = PerfOverlay()
+            Window.add_widget(self.perf_overlay)
+
+    def on_pause(self):
+        # Backgrounded: stop every clock, animation and the camera
+        scheduler.pause()
+        return True
+
+    def on_resume(self):
+        scheduler.resume()
+
+    def on_stop(self):
+        if metrics.enabled:
+            self.dump_perf_trace()
+        self.render_executor.shutdown()
+        if self.scan_history is not None:
+            self.scan_history.close()
+
 if __name__ == '__main__':
     QRCodeApp().run()
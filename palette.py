@@ -0,0 +1,48 @@
+"""Theme colors with no Kivy imports.
+
+THEMES keeps the hex strings; THEME_RGBA is the same table parsed once into
+(r, g, b, a) floats, ready for Kivy color properties. The headless render
+paths (server.py) read the hex directly.
+"""
+
+
+def hex_to_rgba(value):
+    """'#rrggbb' or '#rrggbbaa' to floats in 0..1, like kivy.utils.get_color_from_hex."""
+    value = value.lstrip('#')
+    rgba = [int(value[i:i + 2], 16) / 255.0 for i in range(0, len(value), 2)]
+    if len(rgba) == 3:
+        rgba.append(1.0)
+    return tuple(rgba)
+
+
+THEMES = {
+    'CYBER_BLUE': {
+        'bg_top': '#050510', 'bg_bot': '#0f172a',
+        'accent': '#00f0ff', 'glow': '#00f0ff',
+        'input_bg': '#1e1b4b', 'fg': '#ffffff'
+    },
+    'NEON_PINK': {
+        'bg_top': '#1a0510', 'bg_bot': '#2a0f1b',
+        'accent': '#d946ef', 'glow': '#d946ef',
+        'input_bg': '#380e28', 'fg': '#ffffff'
+    },
+    'TOXIC_GREEN': {
+        'bg_top': '#051a05', 'bg_bot': '#0f2a0f',
+        'accent': '#39ff14', 'glow': '#39ff14',
+        'input_bg': '#0e280e', 'fg': '#ffffff'
+    },
+    'GOLD_MATRIX': {
+        'bg_top': '#000000', 'bg_bot': '#0a0a0a',
+        'accent': '#ffd700', 'glow': '#ffd700',
+        'input_bg': '#1c1c1c', 'fg': '#ffffff'
+    }
+}
+
+# Every theme as {key: (r, g, b, a)}, parsed at import
+THEME_RGBA = {
+    name: {key: hex_to_rgba(value) for key, value in colors.items()}
+    for name, colors in THEMES.items()
+}
+THEME_KEYS = ('bg_top', 'bg_bot', 'accent', 'glow', 'input_bg', 'fg')
+
+DEFAULT_THEME = 'CYBER_BLUE'
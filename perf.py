@@ -0,0 +1,103 @@
+"""Lightweight hot-path instrumentation.
+
+Per-stage timers with rolling percentiles, counters and a bounded trace of
+timed spans that can be dumped in Chrome trace format (chrome://tracing,
+Perfetto). Everything is a no-op until enabled, either with QR_PERF=1 or
+at runtime through ``metrics.enabled``. No Kivy imports.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+class Metrics:
+    def __init__(self, enabled=False, window=256, trace_size=20000):
+        self.enabled = enabled
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counters = defaultdict(int)
+        self._trace = deque(maxlen=trace_size)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, start)
+
+    def record(self, name, seconds, start=None):
+        if not self.enabled:
+            return
+        if start is None:
+            start = time.perf_counter() - seconds
+        with self._lock:
+            self._samples[name].append(seconds)
+            self._trace.append((name, start, seconds, threading.get_ident()))
+
+    def incr(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name] += n
+
+    def error(self, name, exc):
+        # Errors are always printed; counted when instrumentation is on
+        print(f"{name} error: {exc}")
+        self.incr(f"errors.{name.lower()}")
+
+    def count(self, name):
+        return self._counters.get(name, 0)
+
+    def percentile(self, name, pct):
+        with self._lock:
+            values = sorted(self._samples.get(name, ()))
+        if not values:
+            return None
+        k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+        return values[k]
+
+    def snapshot(self):
+        """{'timers': {name: {n, p50_ms, p90_ms, p99_ms}}, 'counters': {...}}"""
+        with self._lock:
+            names = list(self._samples)
+            counters = dict(self._counters)
+        timers = {}
+        for name in names:
+            timers[name] = {
+                'n': len(self._samples[name]),
+                'p50_ms': 1000 * (self.percentile(name, 50) or 0.0),
+                'p90_ms': 1000 * (self.percentile(name, 90) or 0.0),
+                'p99_ms': 1000 * (self.percentile(name, 99) or 0.0),
+            }
+        return {'timers': timers, 'counters': counters}
+
+    def dump_trace(self, path):
+        with self._lock:
+            spans = list(self._trace)
+        events = [
+            {
+                'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                'ts': (start - self._origin) * 1e6, 'dur': seconds * 1e6,
+            }
+            for name, start, seconds, tid in spans
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'metrics': self.snapshot()}, f)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counters.clear()
+            self._trace.clear()
+
+
+metrics = Metrics(enabled=os.environ.get('QR_PERF') == '1')
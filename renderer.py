@@ -0,0 +1,280 @@
+"""Headless QR rendering pipeline.
+
+Everything here is plain qrcode + Pillow with no Kivy imports, so it can be
+called from the UI, a worker, a CLI or a benchmark alike.
+"""
+import functools
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import qrcode
+from PIL import Image as PilImage, ImageColor, ImageDraw, ImageFont
+
+from perf import metrics
+
+# Optional: vectorized rasterizer
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+DEFAULT_FONT_PATH = "arial.ttf"
+ANDROID_FONT_PATH = "/system/fonts/Roboto-Regular.ttf"
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    data: str
+    caption: str = ''
+    fill_color: str = '#101010'
+    back_color: str = 'white'
+    box_size: int = 10
+    border: int = 1
+    logo_path: Optional[str] = 'icon.png'
+    font_path: Optional[str] = None  # None: resolved once per platform
+
+
+# --- QR Matrix ---
+def build_qr(options):
+    qr = qrcode.QRCode(version=1, box_size=options.box_size, border=options.border)
+    qr.add_data(options.data)
+    qr.make(fit=True)
+    return qr
+
+
+def _rgba(color):
+    rgba = ImageColor.getrgb(color)
+    return rgba if len(rgba) == 4 else rgba + (255,)
+
+
+def rasterize(qr, options):
+    """Expand the module matrix straight to an RGBA image in the theme colors."""
+    if not HAS_NUMPY:
+        return qr.make_image(fill_color=options.fill_color, back_color=options.back_color).convert('RGBA')
+
+    box = options.box_size
+    matrix = np.asarray(qr.get_matrix(), dtype=np.uint8)
+    # Pack each RGBA color into one uint32 so the expansion moves whole pixels
+    lut = np.array([_rgba(options.back_color), _rgba(options.fill_color)], dtype=np.uint8).view(np.uint32).ravel()
+    pixels = np.repeat(np.repeat(lut[matrix], box, axis=1), box, axis=0)
+    height, width = pixels.shape
+    return PilImage.frombuffer('RGBA', (width, height), pixels, 'raw', 'RGBA', 0, 1)
+
+
+# --- Icon Logic (Rounded) ---
+LOGO_WIDTH_RATIO = 0.22
+LOGO_RADIUS_RATIO = 0.3
+LOGO_CACHE_SIZE = 8
+
+_logo_cache = OrderedDict()
+_logo_lock = threading.Lock()
+
+
+def _prepare_logo(logo_path, basewidth, radius_ratio):
+    logo = PilImage.open(logo_path).convert("RGBA")
+    wpercent = (basewidth / float(logo.size[0]))
+    hsize = int((float(logo.size[1]) * float(wpercent)))
+    logo = logo.resize((basewidth, hsize), PilImage.Resampling.LANCZOS)
+
+    mask = PilImage.new('L', logo.size, 0)
+    draw = ImageDraw.Draw(mask)
+    radius = int(min(logo.size) * radius_ratio)
+    draw.rounded_rectangle([(0, 0), logo.size], radius=radius, fill=255)
+
+    rounded_logo = PilImage.new('RGBA', logo.size, (0, 0, 0, 0))
+    rounded_logo.paste(logo, (0, 0), mask=mask)
+    return rounded_logo
+
+
+def load_logo(logo_path, basewidth, radius_ratio=LOGO_RADIUS_RATIO):
+    """Return the resized, rounded logo, or None if the file is missing.
+
+    Results are kept in a small LRU keyed on (path, mtime, width, radius) so
+    repeat generations at the same size skip decoding and resampling.
+    """
+    try:
+        mtime = os.stat(logo_path).st_mtime_ns
+    except OSError:
+        return None
+
+    key = (os.path.abspath(logo_path), mtime, basewidth, radius_ratio)
+    with _logo_lock:
+        logo = _logo_cache.get(key)
+        if logo is not None:
+            _logo_cache.move_to_end(key)
+            return logo
+
+    logo = _prepare_logo(logo_path, basewidth, radius_ratio)
+    with _logo_lock:
+        _logo_cache[key] = logo
+        _logo_cache.move_to_end(key)
+        while len(_logo_cache) > LOGO_CACHE_SIZE:
+            _logo_cache.popitem(last=False)
+    return logo
+
+
+def clear_logo_cache():
+    with _logo_lock:
+        _logo_cache.clear()
+
+
+def overlay_logo(img, logo_path):
+    try:
+        if logo_path:
+            logo = load_logo(logo_path, int(img.size[0] * LOGO_WIDTH_RATIO))
+            if logo is not None:
+                pos_x = (img.size[0] - logo.size[0]) // 2
+                pos_y = (img.size[1] - logo.size[1]) // 2
+                img.paste(logo, (pos_x, pos_y), logo)
+    except Exception as e:
+        metrics.error("Icon", e)
+    return img
+
+
+# --- Fonts ---
+FONT_CANDIDATES = (ANDROID_FONT_PATH, DEFAULT_FONT_PATH, "DejaVuSans.ttf")
+
+
+@functools.lru_cache(maxsize=None)
+def default_font_path():
+    """Resolve the first usable platform font once; None means Pillow's default."""
+    for path in FONT_CANDIDATES:
+        try:
+            ImageFont.truetype(path, 12)
+            return path
+        except OSError:
+            continue
+    metrics.error("Font", "no TrueType font found, using default")
+    return None
+
+
+@functools.lru_cache(maxsize=64)
+def get_font(font_path, font_size):
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except Exception as e:
+            metrics.error("Font", e)
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=1024)
+def measure_text(text, font_path, font_size):
+    font = get_font(font_path, font_size)
+    try:
+        # Pillow 10+
+        left, top, right, bottom = font.getbbox(text)
+        return right - left, bottom - top
+    except AttributeError:
+        # Older Pillow
+        return font.getsize(text)
+
+
+# --- Caption Logic ---
+def caption_strip(width, caption, font_path=None):
+    """Render the caption band that goes under a code ``width`` pixels wide."""
+    if font_path is None:
+        font_path = default_font_path()
+
+    # Approximate font size based on image width
+    font_size = int(width * 0.08)
+    strip = PilImage.new("RGBA", (width, font_size + 20), "white")
+
+    draw = ImageDraw.Draw(strip)
+    font = get_font(font_path, font_size)
+
+    # Center text
+    text_w, _ = measure_text(caption, font_path, font_size)
+    draw.text(((width - text_w) / 2, 5), caption, fill="black", font=font)
+    return strip
+
+
+def stack_caption(img, strip):
+    new_img = PilImage.new("RGBA", (img.size[0], img.size[1] + strip.size[1]), "white")
+    new_img.paste(img, (0, 0))
+    new_img.paste(strip, (0, img.size[1]))
+    return new_img
+
+
+def draw_caption(img, caption, font_path=None):
+    if not caption:
+        return img
+    # Add extra space at bottom for caption
+    return stack_caption(img, caption_strip(img.size[0], caption, font_path))
+
+
+# --- Pipeline ---
+def render_qr(options):
+    """Build the full branded QR (matrix, logo, caption) as an RGBA PIL image."""
+    with metrics.timer('render.matrix'):
+        qr = build_qr(options)
+    with metrics.timer('render.raster'):
+        img = rasterize(qr, options)
+    with metrics.timer('render.logo'):
+        img = overlay_logo(img, options.logo_path)
+    with metrics.timer('render.caption'):
+        return draw_caption(img, options.caption, options.font_path)
+
+
+def encode_png(img):
+    with metrics.timer('render.png'):
+        buf = io.BytesIO()
+        img.save(buf, format='PNG')
+        return buf.getvalue()
+
+
+def render_png(options):
+    return encode_png(render_qr(options))
+
+
+# --- Incremental rendering ---
+class LayeredRenderer:
+    """Keeps the layers of the last render so small edits redo only one layer.
+
+    The code layer (matrix, raster and logo) is reused when only the caption
+    changed; the caption strip is reused when only the data changed and the
+    code kept its width. The logo itself comes from load_logo's cache, so a
+    new matrix of the same version and size just pastes it again. Output is
+    identical to render_qr. Not thread-safe: drive it from one worker.
+    """
+
+    def __init__(self):
+        self._code_key = None
+        self._code = None
+        self._strip_key = None
+        self._strip = None
+
+    def render(self, options, cancelled=None):
+        """Return the composited image, or None if ``cancelled()`` turns true midway."""
+        code_key = (options.data, options.fill_color, options.back_color,
+                    options.box_size, options.border, options.logo_path)
+        if code_key != self._code_key:
+            with metrics.timer('render.matrix'):
+                qr = build_qr(options)
+            if cancelled and cancelled():
+                return None
+            with metrics.timer('render.raster'):
+                code = rasterize(qr, options)
+            with metrics.timer('render.logo'):
+                code = overlay_logo(code, options.logo_path)
+            self._code_key, self._code = code_key, code
+            metrics.incr('layers.code')
+        code = self._code
+        if not options.caption:
+            # Callers may hold on to the result; never hand out the cached layer itself
+            return code.copy()
+        if cancelled and cancelled():
+            return None
+
+        strip_key = (options.caption, options.font_path, code.size[0])
+        if strip_key != self._strip_key:
+            with metrics.timer('render.caption'):
+                strip = caption_strip(code.size[0], options.caption, options.font_path)
+            self._strip_key, self._strip = strip_key, strip
+            metrics.incr('layers.caption')
+        return stack_caption(code, self._strip)
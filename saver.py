@@ -0,0 +1,118 @@
+"""Background saving of exported codes.
+
+Files are written on a single worker thread, each one to a temp file that
+is renamed into place, so a crash never leaves a truncated image. Names come
+from a counter persisted next to the files instead of listing the folder.
+No Kivy imports; completion goes back through ``deliver``.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from perf import metrics
+from workers import call_now
+
+COUNTER_FILE = '.qr_counter'
+
+
+def atomic_write(path, data):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class SaveCounter:
+    """Monotonic file number for one folder, persisted in ``COUNTER_FILE``.
+
+    Numbers are never reused, so deleting saved files cannot lead to an
+    overwrite. The folder is only scanned once, to seed a missing counter.
+    """
+
+    def __init__(self, directory, prefix):
+        self.directory = directory
+        self.prefix = prefix
+        self.path = os.path.join(directory, COUNTER_FILE)
+        self._value = None
+
+    def next(self):
+        if self._value is None:
+            self._value = self._load()
+        self._value += 1
+        atomic_write(self.path, str(self._value).encode('ascii'))
+        return self._value
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            pass
+        # First run in this folder (or the counter was lost): continue after the highest existing number
+        pattern = re.compile(re.escape(self.prefix) + r'(\d+)\.')
+        highest = 0
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+        return highest
+
+
+class SaveQueue:
+    """Serial save stage: every submit is written, in order, off the caller's thread."""
+
+    def __init__(self, directory, prefix, deliver=call_now):
+        self.directory = directory
+        self.deliver = deliver
+        self.counter = SaveCounter(directory, prefix)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='qr-save')
+
+    def submit(self, outputs, on_done=None, on_error=None):
+        """Write ``outputs``, a list of (extension, make_bytes), under one new name.
+
+        ``on_done(paths)`` or ``on_error(exc)`` is called through ``deliver``.
+        """
+        future = self._pool.submit(self._save, outputs)
+        future.add_done_callback(lambda f: self._finish(f, on_done, on_error))
+        return future
+
+    def shutdown(self):
+        # Let queued saves finish; they are the user's files
+        self._pool.shutdown(wait=False)
+
+    def _save(self, outputs):
+        with metrics.timer('save'):
+            os.makedirs(self.directory, exist_ok=True)
+            stem = self._free_stem([ext for ext, _ in outputs])
+            paths = []
+            for ext, make_bytes in outputs:
+                path = f"{stem}.{ext}"
+                atomic_write(path, make_bytes())
+                paths.append(path)
+            return paths
+
+    def _free_stem(self, extensions):
+        while True:
+            stem = os.path.join(self.directory, f"{self.counter.prefix}{self.counter.next()}")
+            # Files copied in by hand can still sit on a number; skip past them
+            if not any(os.path.exists(f"{stem}.{ext}") for ext in extensions):
+                return stem
+
+    def _finish(self, future, on_done, on_error):
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                self.deliver(lambda: on_error(error))
+            else:
+                metrics.error("Save", error)
+        elif on_done is not None:
+            paths = future.result()
+            self.deliver(lambda: on_done(paths))
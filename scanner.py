@@ -0,0 +1,415 @@
+"""Frame-to-decode path for the QR scanner.
+
+No Kivy imports: frames arrive as (width, height, rgba_bytes) tuples copied
+off the camera texture, so this runs on a worker thread or offline.
+"""
+from abc import ABC, abstractmethod
+
+# Optional Scanning Dependencies (Desktop Only)
+try:
+    import numpy as np
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+try:
+    from pyzbar.pyzbar import decode
+    HAS_PYZBAR = True
+except ImportError:
+    HAS_PYZBAR = False
+
+# cv2 does the frame conversion and is itself a decoder
+HAS_SCANNER = HAS_CV2
+
+
+# --- Engines ---
+class ScanEngine(ABC):
+    """Decodes a 2-D uint8 grayscale array into [(payload, polygon)]."""
+    name = 'base'
+
+    @classmethod
+    def available(cls):
+        return False
+
+    @abstractmethod
+    def decode(self, gray, thorough=False):
+        pass
+
+
+class PyzbarEngine(ScanEngine):
+    name = 'pyzbar'
+
+    @classmethod
+    def available(cls):
+        return HAS_PYZBAR
+
+    def decode(self, gray, thorough=False):
+        return [
+            (obj.data.decode("utf-8"), [(int(x), int(y)) for x, y in obj.polygon])
+            for obj in decode(gray)
+        ]
+
+
+class OpenCVEngine(ScanEngine):
+    name = 'opencv'
+
+    @classmethod
+    def available(cls):
+        return HAS_CV2 and hasattr(cv2, 'QRCodeDetector')
+
+    def __init__(self):
+        self.detector = cv2.QRCodeDetector()
+        self.multi = hasattr(self.detector, 'detectAndDecodeMulti')
+
+    def decode(self, gray, thorough=False):
+        if self.multi:
+            ok, texts, points, _ = self.detector.detectAndDecodeMulti(gray)
+            if not ok or points is None:
+                return []
+        else:
+            text, pts, _ = self.detector.detectAndDecode(gray)
+            if pts is None:
+                return []
+            texts, points = [text], pts.reshape(1, -1, 2)
+        return [
+            (text, [(int(x), int(y)) for x, y in quad.reshape(-1, 2)])
+            for text, quad in zip(texts, points) if text
+        ]
+
+
+class WeChatEngine(ScanEngine):
+    """OpenCV contrib's CNN-assisted detector; best on damaged or skewed codes."""
+    name = 'wechat'
+
+    @classmethod
+    def available(cls):
+        return HAS_CV2 and hasattr(cv2, 'wechat_qrcode_WeChatQRCode')
+
+    def __init__(self):
+        self.detector = cv2.wechat_qrcode_WeChatQRCode()
+
+    def decode(self, gray, thorough=False):
+        texts, points = self.detector.detectAndDecode(gray)
+        return [
+            (text, [(int(x), int(y)) for x, y in quad.reshape(-1, 2)])
+            for text, quad in zip(texts, points) if text
+        ]
+
+
+class FallbackEngine(ScanEngine):
+    """Try engines in order until one decodes something.
+
+    Quick passes only use the first engine; ``thorough`` passes walk the
+    whole chain, so the slower engines only run where a code is likely.
+    """
+    name = 'auto'
+
+    def __init__(self, engines):
+        self.engines = engines
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def decode(self, gray, thorough=False):
+        chain = self.engines if thorough else self.engines[:1]
+        for engine in chain:
+            symbols = engine.decode(gray, thorough)
+            if symbols:
+                return symbols
+        return []
+
+
+ENGINES = {cls.name: cls for cls in (PyzbarEngine, OpenCVEngine, WeChatEngine)}
+AUTO_CHAIN = ('pyzbar', 'wechat', 'opencv')
+
+
+def available_engines():
+    return [name for name, cls in ENGINES.items() if cls.available()]
+
+
+def make_engine(spec='auto'):
+    """Build an engine from a name, a comma-separated chain, or 'auto'."""
+    names = AUTO_CHAIN if spec == 'auto' else [n.strip() for n in spec.split(',') if n.strip()]
+    engines = []
+    for name in names:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown scan engine: {name}")
+        if ENGINES[name].available():
+            engines.append(ENGINES[name]())
+    if not engines:
+        raise RuntimeError(f"No scan engine available for '{spec}'")
+    return engines[0] if len(engines) == 1 else FallbackEngine(engines)
+
+
+class FrameDecoder:
+    """Decode raw RGBA camera frames through a reused 8-bit luminance buffer.
+
+    The pixel bytes are viewed in place with NumPy, converted to Y8 in one
+    cv2 pass into a buffer kept across frames, and handed to the scan engine
+    as a contiguous grayscale array. Not thread-safe: one instance per worker.
+
+    Each frame is tried cheapest-first: the padded region around the last
+    decoded symbol, then a downscaled copy of the whole frame, and only every
+    ``full_every`` frames a full-resolution sweep. Regions are capped at
+    ``roi_max_side`` / ``scan_max_side`` pixels, so decode cost follows the
+    size of the code rather than the camera resolution. Fallback engines only
+    run on the ROI and full-resolution passes.
+
+    With ``multi`` every decoded symbol gets its own ROI, and the frame-wide
+    passes keep running every ``full_every`` frames even while the ROIs hit,
+    so codes entering the view are picked up next to the ones already seen.
+    """
+
+    def __init__(self, engine='auto', scan_max_side=480, roi_max_side=320, roi_margin=0.5, roi_ttl=15, full_every=10,
+                 multi=False, max_rois=8):
+        self.engine = make_engine(engine) if isinstance(engine, str) else engine
+        self.multi = multi
+        self.max_rois = max_rois
+        self.rois = {}  # multi mode: payload -> [(x, y, w, h), frames since last hit]
+        self.scan_max_side = scan_max_side
+        self.roi_max_side = roi_max_side
+        self.roi_margin = roi_margin
+        self.roi_ttl = roi_ttl
+        self.full_every = full_every
+        self.roi = None  # (x, y, w, h) in full-frame pixels
+        self.last_symbols = []
+        self.stats = {'roi': 0, 'scaled': 0, 'full': 0}
+        # Mean absolute change of a tiny thumbnail vs. the previous frame
+        self.motion = None
+        self._thumb = None
+        self._prev_thumb = None
+        self._gray = None
+        self._scaled = None
+        self._frame_index = 0
+        self._roi_age = 0
+
+    def luminance(self, frame):
+        w, h, pixels = frame
+        # Kivy default texture is RGBA; view it without copying
+        rgba = np.frombuffer(pixels, dtype=np.uint8).reshape(h, w, 4)
+        if self._gray is None or self._gray.shape != (h, w):
+            self._gray = np.empty((h, w), dtype=np.uint8)
+        cv2.cvtColor(rgba, cv2.COLOR_RGBA2GRAY, dst=self._gray)
+        return self._gray
+
+    def __call__(self, frame):
+        """Return the decoded payload strings, or None if nothing was found."""
+        gray = self.luminance(frame)
+        self._frame_index += 1
+        self._measure_motion(gray)
+        symbols = self.scan(gray)
+        self.last_symbols = symbols
+        return [data for data, _ in symbols] or None
+
+    def _measure_motion(self, gray, size=(32, 24)):
+        if self._thumb is None:
+            self._thumb = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._prev_thumb = np.empty_like(self._thumb)
+            cv2.resize(gray, size, dst=self._prev_thumb, interpolation=cv2.INTER_AREA)
+            return
+        cv2.resize(gray, size, dst=self._thumb, interpolation=cv2.INTER_AREA)
+        self.motion = cv2.norm(self._thumb, self._prev_thumb, cv2.NORM_L1) / self._thumb.size
+        self._thumb, self._prev_thumb = self._prev_thumb, self._thumb
+
+    def scan(self, gray):
+        """Return [(payload, polygon)] with polygons in full-frame pixels."""
+        if self.multi:
+            return self._scan_multi(gray)
+        h, w = gray.shape
+        if self.roi is not None:
+            symbols = self._decode_region(gray, self.roi, self.roi_max_side, thorough=True)
+            if symbols:
+                self.stats['roi'] += 1
+                return self._track(symbols, w, h)
+            self._roi_age += 1
+            if self._roi_age > self.roi_ttl:
+                self.roi = None
+
+        symbols = self._decode_region(gray, (0, 0, w, h), self.scan_max_side, reuse=True)
+        if symbols:
+            self.stats['scaled'] += 1
+            return self._track(symbols, w, h)
+
+        if self._frame_index % self.full_every == 0:
+            symbols = self._decode_region(gray, (0, 0, w, h), None, thorough=True)
+            if symbols:
+                self.stats['full'] += 1
+                return self._track(symbols, w, h)
+        return []
+
+    def _scan_multi(self, gray):
+        h, w = gray.shape
+        found = {}
+        for payload, tracked in list(self.rois.items()):
+            for data, polygon in self._decode_region(gray, tracked[0], self.roi_max_side, thorough=True):
+                found.setdefault(data, polygon)
+            if payload not in found:
+                tracked[1] += 1
+                if tracked[1] > self.roi_ttl:
+                    del self.rois[payload]
+        if found:
+            self.stats['roi'] += 1
+
+        # The ROIs only ever see codes already found; sweep the frame for new ones
+        full_frame = self._frame_index % self.full_every == 0
+        if not found or full_frame:
+            symbols = self._decode_region(gray, (0, 0, w, h), self.scan_max_side, reuse=True)
+            if symbols:
+                self.stats['scaled'] += 1
+            if full_frame:
+                full = self._decode_region(gray, (0, 0, w, h), None, thorough=True)
+                if full:
+                    self.stats['full'] += 1
+                symbols += full
+            for data, polygon in symbols:
+                found.setdefault(data, polygon)
+
+        for data, polygon in found.items():
+            self.rois.pop(data, None)
+            self.rois[data] = [self._padded([polygon], w, h), 0]
+        while len(self.rois) > self.max_rois:
+            # Oldest first: dict order is insertion order, refreshed above
+            del self.rois[next(iter(self.rois))]
+        return list(found.items())
+
+    def _decode_region(self, gray, region, max_side, reuse=False, thorough=False):
+        x, y, rw, rh = region
+        crop = gray[y:y + rh, x:x + rw]
+        scale = 1.0
+        if max_side and max(rw, rh) > max_side:
+            scale = max_side / float(max(rw, rh))
+            size = (max(1, int(rw * scale)), max(1, int(rh * scale)))
+            if reuse:
+                if self._scaled is None or self._scaled.shape != (size[1], size[0]):
+                    self._scaled = np.empty((size[1], size[0]), dtype=np.uint8)
+                crop = cv2.resize(crop, size, dst=self._scaled, interpolation=cv2.INTER_AREA)
+            else:
+                crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+        elif not crop.flags['C_CONTIGUOUS']:
+            crop = np.ascontiguousarray(crop)
+
+        return [
+            (data, [(int(px / scale) + x, int(py / scale) + y) for px, py in polygon])
+            for data, polygon in self.engine.decode(crop, thorough)
+        ]
+
+    def _track(self, symbols, w, h):
+        # Next frame starts with the padded bounding box of everything found
+        self.roi = self._padded([polygon for _, polygon in symbols], w, h)
+        self._roi_age = 0
+        return symbols
+
+    def _padded(self, polygons, w, h):
+        xs = [px for polygon in polygons for px, _ in polygon]
+        ys = [py for polygon in polygons for _, py in polygon]
+        x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+        pad_x = int((x1 - x0) * self.roi_margin) + 8
+        pad_y = int((y1 - y0) * self.roi_margin) + 8
+        x0, y0 = max(0, x0 - pad_x), max(0, y0 - pad_y)
+        x1, y1 = min(w, x1 + pad_x), min(h, y1 + pad_y)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+
+class DedupWindow:
+    """Emit each payload once per appearance.
+
+    A payload counts as a new appearance only after it has been missing from
+    the decoded stream for ``window`` seconds.
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._last_seen = {}
+
+    def feed(self, payloads, now):
+        fresh = []
+        for payload in payloads:
+            last = self._last_seen.get(payload)
+            if last is None or now - last > self.window:
+                fresh.append(payload)
+            self._last_seen[payload] = now
+        if len(self._last_seen) > 256:
+            self._expire(now)
+        return fresh
+
+    def reset(self):
+        self._last_seen.clear()
+
+    def _expire(self, now):
+        self._last_seen = {p: t for p, t in self._last_seen.items() if now - t <= self.window}
+
+
+class ScanRateController:
+    """Pick the scan polling rate from measured decode cost and camera activity.
+
+    - never poll faster than the decoder (with some headroom) or the camera
+      can keep up with
+    - back off while the camera delivers no new frames
+    - drop to ``idle_rate`` after ``idle_after`` seconds with neither a
+      detection nor motion in the picture, and jump back up on either
+    Rates are snapped to a few fixed levels so the Clock interval is not
+    rescheduled on every tick.
+    """
+
+    LEVELS = (30.0, 20.0, 15.0, 10.0, 6.0, 4.0, 2.0)
+
+    def __init__(self, max_rate=30.0, idle_rate=4.0, idle_after=8.0, motion_threshold=4.0, headroom=1.25):
+        self.max_rate = max_rate
+        self.idle_rate = idle_rate
+        self.idle_after = idle_after
+        self.motion_threshold = motion_threshold
+        self.headroom = headroom
+        self.reset(0.0)
+
+    def reset(self, now):
+        self.rate = self.max_rate
+        self.decode_ema = None
+        self.frame_interval_ema = None
+        self.last_frame = None
+        self.last_active = now
+        self.new_frames = 0
+        self.backoff = 1.0
+
+    def frame_arrived(self, now):
+        if self.last_frame is not None:
+            self.frame_interval_ema = self._ema(self.frame_interval_ema, now - self.last_frame)
+        self.last_frame = now
+        self.new_frames += 1
+
+    def decoded(self, duration, found, motion, now):
+        self.decode_ema = self._ema(self.decode_ema, duration)
+        if found or (motion is not None and motion > self.motion_threshold):
+            self.last_active = now
+
+    @property
+    def idle(self):
+        return self.rate <= self.idle_rate
+
+    def next_rate(self, now, saw_new_frame):
+        if now - self.last_active > self.idle_after:
+            target = self.idle_rate
+        else:
+            target = self.max_rate
+            if self.decode_ema:
+                target = min(target, 1.0 / (self.decode_ema * self.headroom))
+            if self.frame_interval_ema:
+                target = min(target, 1.0 / self.frame_interval_ema)
+
+        # Camera stalled: halve the rate per empty tick, recover immediately
+        self.backoff = 1.0 if saw_new_frame else min(self.backoff * 2.0, 8.0)
+        target /= self.backoff
+
+        self.rate = self._snap(max(target, self.LEVELS[-1]))
+        return self.rate
+
+    def _snap(self, rate):
+        for level in self.LEVELS:
+            if rate >= level:
+                return min(level, self.max_rate)
+        return self.LEVELS[-1]
+
+    @staticmethod
+    def _ema(old, value, alpha=0.2):
+        return value if old is None else old + alpha * (value - old)
@@ -0,0 +1,168 @@
+"""Central frame scheduler.
+
+Every recurring callback, repeating animation or other "live" activity is
+registered here against an owner (usually a Screen). An activity only runs
+while it is enabled, its owner is visible and the app is not paused, so
+nothing ticks in the background while the user is elsewhere or the app is
+backgrounded on Android.
+"""
+from kivy.animation import Animation
+from kivy.clock import Clock
+
+
+class Activity:
+    def __init__(self, start, stop, owner, enabled=True, one_shot=False):
+        self.start = start
+        self.stop = stop
+        self.owner = owner
+        self.enabled = enabled
+        self.one_shot = one_shot
+        self.running = False
+
+
+class IntervalActivity(Activity):
+    """A Clock interval whose rate can be changed while it runs."""
+
+    def __init__(self, callback, rate, owner, enabled=True):
+        super().__init__(self._start, self._stop, owner, enabled)
+        self.callback = callback
+        self.rate = rate
+        self._event = None
+
+    def _start(self):
+        self._event = Clock.schedule_interval(self.callback, 1.0 / self.rate)
+
+    def _stop(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def set_rate(self, rate):
+        if rate == self.rate:
+            return
+        self.rate = rate
+        if self._event is not None:
+            self._stop()
+            self._start()
+
+
+class FrameScheduler:
+    def __init__(self):
+        self.paused = False
+        self._activities = {}
+        # None is the app itself, always visible
+        self._visible = {None}
+
+    # --- Registration ---
+    def add_interval(self, owner, name, callback, rate=60.0, enabled=True):
+        """Run ``callback(dt)`` at ``rate`` Hz while ``owner`` is on screen."""
+        return self._add(owner, name, IntervalActivity(callback, rate, owner, enabled))
+
+    def add_animation(self, owner, name, make_anim, widget, enabled=True):
+        """Keep a (usually repeating) animation alive while ``owner`` is on screen.
+
+        ``make_anim`` is called on every (re)start so positions are current.
+        """
+        def start():
+            make_anim().start(widget)
+
+        def stop():
+            Animation.cancel_all(widget)
+        return self._add(owner, name, Activity(start, stop, owner, enabled))
+
+    def add_activity(self, owner, name, start, stop, enabled=True):
+        return self._add(owner, name, Activity(start, stop, owner, enabled))
+
+    def run_animation(self, owner, name, anim, widget):
+        """Start a finite animation now; it is cancelled, not resumed, if hidden."""
+        self.remove(owner, name)
+        activity = Activity(lambda: anim.start(widget), lambda: anim.cancel(widget), owner, one_shot=True)
+        anim.bind(on_complete=lambda *args: self._finished(owner, name, activity))
+        self._add(owner, name, activity)
+        if not activity.running:
+            # Owner is hidden or the app paused: skip it rather than defer it
+            self._drop(activity)
+        return activity
+
+    def remove(self, owner, name):
+        activity = self._activities.pop((id(owner), name), None)
+        if activity is not None and activity.running:
+            activity.stop()
+            activity.running = False
+
+    def get(self, owner, name):
+        return self._activities.get((id(owner), name))
+
+    # --- State changes ---
+    def enable(self, owner, name, enabled=True):
+        activity = self.get(owner, name)
+        if activity is not None:
+            activity.enabled = enabled
+            self._sync(activity)
+
+    def disable(self, owner, name):
+        self.enable(owner, name, False)
+
+    def set_rate(self, owner, name, rate):
+        activity = self.get(owner, name)
+        if isinstance(activity, IntervalActivity):
+            activity.set_rate(rate)
+
+    def show(self, owner):
+        self._visible.add(id(owner))
+        self._sync_all()
+
+    def hide(self, owner):
+        self._visible.discard(id(owner))
+        self._sync_all()
+
+    def pause(self):
+        self.paused = True
+        self._sync_all()
+
+    def resume(self):
+        self.paused = False
+        self._sync_all()
+
+    @property
+    def running_count(self):
+        return sum(1 for a in self._activities.values() if a.running)
+
+    # --- Internals ---
+    def _add(self, owner, name, activity):
+        self.remove(owner, name)
+        self._activities[(id(owner), name)] = activity
+        self._sync(activity)
+        return activity
+
+    def _should_run(self, activity):
+        owner = None if activity.owner is None else id(activity.owner)
+        return activity.enabled and not self.paused and owner in self._visible
+
+    def _sync(self, activity):
+        want = self._should_run(activity)
+        if want and not activity.running:
+            activity.start()
+            activity.running = True
+        elif not want and activity.running:
+            activity.stop()
+            activity.running = False
+            if activity.one_shot:
+                self._drop(activity)
+
+    def _sync_all(self):
+        for activity in list(self._activities.values()):
+            self._sync(activity)
+
+    def _finished(self, owner, name, activity):
+        activity.running = False
+        if self.get(owner, name) is activity:
+            self._drop(activity)
+
+    def _drop(self, activity):
+        for key, value in list(self._activities.items()):
+            if value is activity:
+                del self._activities[key]
+
+
+scheduler = FrameScheduler()
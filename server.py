@@ -0,0 +1,365 @@
+"""Headless QR rendering service for kiosks.
+
+Serves the app's branded codes (logo, caption layout) over HTTP on
+localhost, without Kivy:
+
+    python server.py serve --port 8765
+    curl 'http://127.0.0.1:8765/qr?data=hello&caption=ASSET%201&theme=NEON_PINK' > qr.png
+
+Identical requests that arrive while a render is in flight share that
+render, results live in a shared RenderCache, and responses carry a strong
+ETag (the cache key) so clients can revalidate with If-None-Match.
+
+A local load generator is bundled; without --url it starts its own server:
+
+    python server.py load --concurrency 16 --requests 5000 --unique 100
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from qrcode.exceptions import DataOverflowError
+
+from cache import RenderCache, cache_key
+from palette import THEMES
+from perf import metrics
+from renderer import RenderOptions, render_qr
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PORT = 8765
+MAX_BOX_SIZE = 40
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110 13.1.2)."""
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+# --- Service ---
+class QRService:
+    """Shared cache plus coalescing of identical in-flight renders."""
+
+    def __init__(self, cache=None, logo_path=os.path.join(HERE, 'icon.png'), max_age=3600):
+        self.cache = cache if cache is not None else RenderCache()
+        self.logo_path = logo_path
+        self.max_age = max_age
+        self.renders = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def options_from_query(self, query):
+        params = parse_qs(query, keep_blank_values=True)
+
+        def param(name, default=''):
+            values = params.get(name)
+            return values[0] if values else default
+
+        data = param('data')
+        if not data:
+            raise BadRequest("missing 'data'")
+        kwargs = {'data': data, 'caption': param('caption'), 'logo_path': self.logo_path}
+
+        theme = param('theme')
+        if theme:
+            colors = THEMES.get(theme.upper())
+            if colors is None:
+                raise BadRequest(f"unknown theme {theme!r}, expected one of {', '.join(THEMES)}")
+            # The theme's dark background as module color keeps the code scannable on white
+            kwargs['fill_color'] = colors['bg_top']
+
+        box = param('box')
+        if box:
+            try:
+                kwargs['box_size'] = int(box)
+            except ValueError:
+                raise BadRequest("'box' must be an integer")
+            if not 1 <= kwargs['box_size'] <= MAX_BOX_SIZE:
+                raise BadRequest(f"'box' must be between 1 and {MAX_BOX_SIZE}")
+        return RenderOptions(**kwargs)
+
+    def get_png(self, options, key=None):
+        """Return (etag, png bytes) for ``options``, rendering at most once per key at a time."""
+        if key is None:
+            key = cache_key(options)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return key, self.cache.ensure_png(entry)
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            metrics.incr('server.coalesced')
+            return key, future.result()
+
+        try:
+            with metrics.timer('server.render'):
+                entry = self.cache.put(key, render_qr(options))
+                png = self.cache.ensure_png(entry)
+            with self._lock:
+                self.renders += 1
+            future.set_result(png)
+            return key, png
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self):
+        return {
+            'renders': self.renders,
+            'coalesced': self.coalesced,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'cache_entries': len(self.cache),
+            'cache_bytes': self.cache.nbytes,
+            'disk_cache_bytes': self.cache.disk_nbytes,
+            'metrics': metrics.snapshot(),
+        }
+
+
+# --- HTTP ---
+class QRRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so load tests measure rendering rather than TCP setup
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    server_version = 'DhanvanthQR/1.0'
+    verbose = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/qr':
+            self._serve_qr(url.query)
+        elif url.path == '/stats':
+            self._send(200, json.dumps(self.server.service.stats()).encode('utf-8'), 'application/json')
+        else:
+            self._send(404, b"not found\n", 'text/plain')
+
+    def _serve_qr(self, query):
+        service = self.server.service
+        with metrics.timer('server.request'):
+            try:
+                options = service.options_from_query(query)
+                # The ETag is the cache key, known without rendering: answer revalidations up front
+                key = cache_key(options)
+                etag = f'"{key}"'
+                headers = {'ETag': etag, 'Cache-Control': f"public, max-age={service.max_age}"}
+                if etag_matches(self.headers.get('If-None-Match', ''), etag):
+                    metrics.incr('server.not_modified')
+                    self._send(304, b'', None, headers)
+                    return
+                key, png = service.get_png(options, key)
+            except (ValueError, DataOverflowError) as e:
+                # BadRequest, or qrcode rejecting data that does not fit any version
+                self._send(400, f"{str(e) or 'data too long'}\n".encode('utf-8'), 'text/plain')
+                return
+            except Exception as e:
+                metrics.error("Server", e)
+                self._send(500, b"render failed\n", 'text/plain')
+                return
+            self._send(200, png, 'image/png', headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # The default logs every request to stderr, which dominates under load
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+class QRHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections under a burst of clients
+    request_queue_size = 128
+
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, service=None, verbose=False):
+    handler = type('Handler', (QRRequestHandler,), {'verbose': verbose})
+    httpd = QRHTTPServer((host, port), handler)
+    httpd.service = service if service is not None else QRService()
+    return httpd
+
+
+def cmd_serve(args):
+    disk_dir = args.disk_cache or None
+    cache = RenderCache(max_bytes=args.cache_mb * 1024 * 1024, disk_dir=disk_dir,
+                        disk_max_bytes=args.disk_cache_mb * 1024 * 1024)
+    service = QRService(cache, logo_path=args.logo or None, max_age=args.max_age)
+    httpd = make_server(args.host, args.port, service, args.verbose)
+    print(f"Serving QR codes on http://{args.host}:{httpd.server_address[1]}/qr?data=...")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    return 0
+
+
+# --- Load generator ---
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def run_load(host, port, requests, concurrency, unique, revalidate=False, seed=0):
+    """Hit /qr from ``concurrency`` keep-alive clients; payloads repeat over ``unique`` values."""
+    rng = random.Random(seed)
+    paths = [
+        f"/qr?data={quote(f'https://asset.example.com/{i:05d}')}&caption={quote(f'ASSET {i}')}"
+        for i in range(unique)
+    ]
+    plan = [rng.choice(paths) for _ in range(requests)]
+    lock = threading.Lock()
+    cursor = [0]
+    latencies = []
+    statuses = {}
+
+    def client():
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        etags = {}
+        local = []
+        try:
+            while True:
+                with lock:
+                    if cursor[0] >= len(plan):
+                        break
+                    path = plan[cursor[0]]
+                    cursor[0] += 1
+                headers = {'If-None-Match': etags[path]} if revalidate and path in etags else {}
+                start = time.perf_counter()
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                local.append(time.perf_counter() - start)
+                if resp.status == 200 and resp.getheader('ETag'):
+                    etags[path] = resp.getheader('ETag')
+                with lock:
+                    statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        finally:
+            conn.close()
+            with lock:
+                latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'unique': unique,
+        'rps': len(latencies) / wall if wall else 0.0,
+        'p50_ms': 1000 * percentile(latencies, 50),
+        'p90_ms': 1000 * percentile(latencies, 90),
+        'p99_ms': 1000 * percentile(latencies, 99),
+        'max_ms': 1000 * latencies[-1] if latencies else 0.0,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def cmd_load(args):
+    httpd = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        # Self-hosted: an in-process server on a free port
+        httpd = make_server('127.0.0.1', 0)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        host, port = httpd.server_address[:2]
+
+    try:
+        result = run_load(host, port, args.requests, args.concurrency, args.unique, args.revalidate, args.seed)
+        if httpd is not None:
+            result['server'] = {k: v for k, v in httpd.service.stats().items() if k != 'metrics'}
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+
+    print(f"{result['requests']} requests  {result['rps']:.1f} req/s  "
+          f"concurrency {result['concurrency']}  unique {result['unique']}")
+    print(f"latency p50 {result['p50_ms']:.2f} ms  p90 {result['p90_ms']:.2f} ms  "
+          f"p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.2f} ms")
+    print(f"status {result['statuses']}")
+    if 'server' in result:
+        print(f"server {result['server']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless QR rendering service.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('serve', help="serve /qr over HTTP")
+    p.add_argument('--host', default='127.0.0.1', help="bind address (default: localhost only)")
+    p.add_argument('--port', type=int, default=DEFAULT_PORT)
+    p.add_argument('--logo', default=os.path.join(HERE, 'icon.png'), help="logo to overlay ('' for none)")
+    p.add_argument('--cache-mb', type=int, default=64, help="memory budget of the render cache")
+    p.add_argument('--disk-cache', help="directory for a persistent PNG cache")
+    p.add_argument('--disk-cache-mb', type=int, default=256, help="size cap of the disk cache (oldest files go first)")
+    p.add_argument('--max-age', type=int, default=3600, help="Cache-Control max-age in seconds")
+    p.add_argument('--verbose', action='store_true', help="log every request")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser('load', help="local load generator")
+    p.add_argument('--url', help="server to hit, e.g. http://127.0.0.1:8765 (default: start one in-process)")
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--unique', type=int, default=50, help="distinct payloads; fewer means more cache hits")
+    p.add_argument('--revalidate', action='store_true', help="send If-None-Match once an ETag is known")
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--json', help="write results to this file")
+    p.set_defaults(func=cmd_load)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
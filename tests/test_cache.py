@@ -0,0 +1,170 @@
+import os
+import time
+
+from PIL import Image as PilImage
+
+from cache import CacheEntry, RenderCache, cache_key
+from renderer import RenderOptions
+
+# 10x10 RGBA: 400 bytes per image, 800 once a texture is attached
+SIDE = 10
+IMAGE_BYTES = SIDE * SIDE * 4
+
+
+def image(shade=0):
+    return PilImage.new('RGBA', (SIDE, SIDE), (shade, shade, shade, 255))
+
+
+def age(cache, key, seconds_ago):
+    """Backdate a disk entry's mtime, the disk tier's LRU clock."""
+    t = time.time() - seconds_ago
+    os.utime(cache._disk_path(key), (t, t))
+
+
+def test_cache_key_follows_options():
+    a = cache_key(RenderOptions(data='a'))
+    assert a == cache_key(RenderOptions(data='a'))
+    assert a != cache_key(RenderOptions(data='b'))
+    assert a != cache_key(RenderOptions(data='a', caption='c'))
+
+
+def test_put_get_and_stats():
+    cache = RenderCache(max_bytes=10 * IMAGE_BYTES)
+    entry = cache.put('k', image())
+    assert cache.get('k') is entry
+    assert cache.get('missing') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.nbytes == IMAGE_BYTES
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = RenderCache(max_bytes=3 * IMAGE_BYTES)
+    for key in 'abc':
+        cache.put(key, image())
+    cache.get('a')  # a is now the most recent
+    cache.put('d', image())
+    assert cache.peek('b') is None
+    assert [k for k in 'acd' if cache.peek(k)] == ['a', 'c', 'd']
+    assert cache.nbytes == 3 * IMAGE_BYTES
+
+
+def test_peek_does_not_touch_lru_order():
+    cache = RenderCache(max_bytes=2 * IMAGE_BYTES)
+    cache.put('a', image())
+    cache.put('b', image())
+    assert cache.peek('a') is not None
+    cache.put('c', image())
+    assert cache.peek('a') is None
+    assert cache.hits == 0
+
+
+def test_replacing_a_key_reaccounts_bytes():
+    cache = RenderCache(max_bytes=10 * IMAGE_BYTES)
+    cache.put('a', image(1))
+    cache.put('a', image(2))
+    assert len(cache) == 1
+    assert cache.nbytes == IMAGE_BYTES
+
+
+def test_png_and_texture_are_accounted_and_can_evict():
+    cache = RenderCache(max_bytes=3 * IMAGE_BYTES)
+    a = cache.put('a', image())
+    cache.put('b', image())
+    png = cache.ensure_png(a)
+    assert png.startswith(b'\x89PNG')
+    assert cache.nbytes == 2 * IMAGE_BYTES + len(png)
+
+    b = cache.peek('b')
+    cache.attach_texture(b, object())
+    # b alone is now 800 bytes; a has to go to get back under 1200
+    assert cache.peek('a') is None
+    assert cache.nbytes == b.nbytes == 2 * IMAGE_BYTES
+
+
+def test_detached_entries_are_not_accounted():
+    cache = RenderCache(max_bytes=10 * IMAGE_BYTES)
+    detached = CacheEntry('x', image=image())
+    cache.attach_texture(detached, object())
+    assert detached.texture is not None
+    assert cache.nbytes == 0 and len(cache) == 0
+
+
+def test_oversized_newest_entry_is_kept():
+    cache = RenderCache(max_bytes=IMAGE_BYTES // 2)
+    cache.put('a', image())
+    cache.put('b', image())
+    assert cache.peek('a') is None
+    assert cache.peek('b') is not None
+
+
+def test_disk_tier_serves_after_memory_eviction(tmp_path):
+    cache = RenderCache(max_bytes=IMAGE_BYTES, disk_dir=str(tmp_path))
+    png = cache.ensure_png(cache.put('a', image(7)))
+    cache.put('b', image())
+    assert cache.peek('a') is None
+
+    entry = cache.get('a')
+    assert entry.png == png
+    assert entry.get_image().getpixel((0, 0)) == (7, 7, 7, 255)
+    assert cache.disk_nbytes == len(png)
+
+
+def test_restart_rebuilds_disk_index(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path))
+    sizes = {key: len(cache.ensure_png(cache.put(key, image(i)))) for i, key in enumerate('abc')}
+    (tmp_path / 'notes.txt').write_text('ignored')
+
+    reopened = RenderCache(disk_dir=str(tmp_path))
+    assert reopened.disk_nbytes == sum(sizes.values())
+    assert len(reopened) == 0
+    assert reopened.get('b').png is not None
+
+
+def test_restart_orders_disk_lru_by_mtime(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path))
+    for i, key in enumerate('abc'):
+        cache.ensure_png(cache.put(key, image(i)))
+    for key, seconds_ago in (('a', 10), ('b', 30), ('c', 20)):
+        age(cache, key, seconds_ago)
+
+    reopened = RenderCache(disk_dir=str(tmp_path))
+    assert list(reopened._disk_index) == ['b', 'c', 'a']
+
+
+def test_disk_hit_refreshes_mtime_across_restarts(tmp_path):
+    cache = RenderCache(max_bytes=IMAGE_BYTES, disk_dir=str(tmp_path))
+    for key in 'ab':
+        cache.ensure_png(cache.put(key, image()))
+    age(cache, 'a', 30)
+    age(cache, 'b', 20)
+    cache.clear()
+    cache.get('a')
+
+    reopened = RenderCache(disk_dir=str(tmp_path))
+    assert list(reopened._disk_index) == ['b', 'a']
+
+
+def test_disk_budget_evicts_oldest_files(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path))
+    png_size = len(cache.ensure_png(cache.put('a', image(1))))
+    age(cache, 'a', 60)
+    # Room for two files, not three
+    budget = 2 * png_size + png_size // 2
+    limited = RenderCache(disk_dir=str(tmp_path), disk_max_bytes=budget)
+    for i, key in enumerate('bc', 2):
+        limited.ensure_png(limited.put(key, image(i)))
+
+    assert sorted(os.listdir(tmp_path)) == ['b.png', 'c.png']
+    assert limited.disk_nbytes <= budget
+    assert limited.get('a') is None
+
+
+def test_startup_scan_enforces_a_smaller_budget(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path))
+    for i, key in enumerate('abc'):
+        cache.ensure_png(cache.put(key, image(i)))
+        age(cache, key, 30 - 10 * i)
+
+    RenderCache(disk_dir=str(tmp_path), disk_max_bytes=1)
+    # Only the newest file is kept, even though it alone is over budget
+    assert os.listdir(tmp_path) == ['c.png']
@@ -0,0 +1,126 @@
+import os
+import threading
+
+import pytest
+
+from saver import COUNTER_FILE, SaveCounter, SaveQueue, atomic_write
+
+
+def touch(directory, name):
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(b'x')
+
+
+def save_sync(queue, outputs):
+    """Submit and wait; returns (paths, error)."""
+    done = threading.Event()
+    result = {}
+
+    def on_done(paths):
+        result['paths'] = paths
+        done.set()
+
+    def on_error(exc):
+        result['error'] = exc
+        done.set()
+
+    queue.submit(outputs, on_done=on_done, on_error=on_error)
+    assert done.wait(5)
+    return result.get('paths'), result.get('error')
+
+
+def test_atomic_write_leaves_no_temp_files(tmp_path):
+    path = tmp_path / 'a.bin'
+    atomic_write(str(path), b'one')
+    atomic_write(str(path), b'two')
+    assert path.read_bytes() == b'two'
+    assert os.listdir(tmp_path) == ['a.bin']
+
+
+def test_counter_starts_at_one_in_empty_folder(tmp_path):
+    counter = SaveCounter(str(tmp_path), 'QR_')
+    assert [counter.next() for _ in range(3)] == [1, 2, 3]
+    assert (tmp_path / COUNTER_FILE).read_text() == '3'
+
+
+def test_counter_seeds_from_highest_existing_file(tmp_path):
+    for name in ('QR_3.png', 'QR_12.pdf', 'QR_x.png', 'Other_99.png'):
+        touch(str(tmp_path), name)
+    assert SaveCounter(str(tmp_path), 'QR_').next() == 13
+
+
+def test_counter_persists_and_never_reuses_after_deletes(tmp_path):
+    counter = SaveCounter(str(tmp_path), 'QR_')
+    counter.next()
+    counter.next()
+    touch(str(tmp_path), 'QR_2.png')
+    os.remove(tmp_path / 'QR_2.png')
+    # A fresh instance reads the persisted value instead of listing the folder
+    assert SaveCounter(str(tmp_path), 'QR_').next() == 3
+
+
+def test_counter_recovers_from_corrupt_file(tmp_path):
+    (tmp_path / COUNTER_FILE).write_text('garbage')
+    touch(str(tmp_path), 'QR_4.png')
+    assert SaveCounter(str(tmp_path), 'QR_').next() == 5
+
+
+def test_queue_writes_all_formats_under_one_stem(tmp_path):
+    queue = SaveQueue(str(tmp_path), 'QR_')
+    paths, error = save_sync(queue, [('png', lambda: b'png'), ('svg', lambda: b'<svg/>')])
+    assert error is None
+    assert [os.path.basename(p) for p in paths] == ['QR_1.png', 'QR_1.svg']
+    assert (tmp_path / 'QR_1.svg').read_bytes() == b'<svg/>'
+
+
+def test_queue_skips_taken_names(tmp_path):
+    # Counter says 1, but a copied-in file already uses the next number
+    (tmp_path / COUNTER_FILE).write_text('1')
+    touch(str(tmp_path), 'QR_2.pdf')
+    queue = SaveQueue(str(tmp_path), 'QR_')
+    paths, _ = save_sync(queue, [('png', lambda: b'a'), ('pdf', lambda: b'b')])
+    assert [os.path.basename(p) for p in paths] == ['QR_3.png', 'QR_3.pdf']
+    assert (tmp_path / 'QR_2.pdf').read_bytes() == b'x'
+
+
+def test_queue_reports_errors_and_keeps_going(tmp_path):
+    queue = SaveQueue(str(tmp_path), 'QR_')
+    _, error = save_sync(queue, [('png', lambda: 1 / 0)])
+    assert isinstance(error, ZeroDivisionError)
+    paths, error = save_sync(queue, [('png', lambda: b'ok')])
+    assert error is None and os.path.basename(paths[0]) == 'QR_2.png'
+    assert not [n for n in os.listdir(tmp_path) if n.endswith('.tmp')]
+
+
+def test_queue_saves_in_submission_order(tmp_path):
+    queue = SaveQueue(str(tmp_path), 'QR_')
+    futures = [queue.submit([('png', lambda i=i: str(i).encode())]) for i in range(5)]
+    names = [os.path.basename(f.result(timeout=5)[0]) for f in futures]
+    assert names == [f"QR_{i}.png" for i in range(1, 6)]
+    assert [(tmp_path / n).read_bytes() for n in names] == [b'0', b'1', b'2', b'3', b'4']
+
+
+def test_queue_delivers_through_deliver(tmp_path):
+    delivered = []
+    arrived = threading.Event()
+
+    def deliver(fn):
+        delivered.append(fn)
+        arrived.set()
+
+    called = []
+    queue = SaveQueue(str(tmp_path), 'QR_', deliver=deliver)
+    queue.submit([('png', lambda: b'a')], on_done=called.append)
+    assert arrived.wait(5)
+    # Callbacks are handed to deliver (the Kivy clock in the app), not called directly
+    assert called == []
+    delivered[0]()
+    assert [os.path.basename(p) for p in called[0]] == ['QR_1.png']
+
+
+@pytest.mark.parametrize('prefix', ['QR_', 'Saved_QR_'])
+def test_prefixes_do_not_cross_seed(tmp_path, prefix):
+    touch(str(tmp_path), 'QR_50.png')
+    touch(str(tmp_path), 'Saved_QR_7.png')
+    expected = 51 if prefix == 'QR_' else 8
+    assert SaveCounter(str(tmp_path), prefix).next() == expected
@@ -0,0 +1,129 @@
+import pytest
+
+import scanner
+from scanner import DedupWindow
+
+
+# --- DedupWindow ---
+def test_dedup_emits_each_payload_once_while_in_view():
+    dedup = DedupWindow(window=2.0)
+    assert dedup.feed(['A'], 0.0) == ['A']
+    assert dedup.feed(['A'], 0.5) == []
+    assert dedup.feed(['A', 'B'], 1.0) == ['B']
+
+
+def test_dedup_window_slides_with_each_sighting():
+    dedup = DedupWindow(window=2.0)
+    dedup.feed(['A'], 0.0)
+    # Seen continuously: never re-emitted, even long after the first sighting
+    for t in (1.5, 3.0, 4.5):
+        assert dedup.feed(['A'], t) == []
+    # Gone for longer than the window: a new appearance
+    assert dedup.feed(['A'], 7.0) == ['A']
+
+
+def test_dedup_reset_forgets_everything():
+    dedup = DedupWindow(window=2.0)
+    dedup.feed(['A'], 0.0)
+    dedup.reset()
+    assert dedup.feed(['A'], 0.1) == ['A']
+
+
+def test_dedup_expires_old_payloads_when_large():
+    dedup = DedupWindow(window=1.0)
+    dedup.feed([str(i) for i in range(300)], 0.0)
+    dedup.feed(['new'], 5.0)
+    assert len(dedup._last_seen) == 1
+
+
+# --- ScanRateController ---
+def test_rate_starts_at_max_and_snaps_to_levels():
+    ctl = scanner.ScanRateController()
+    assert ctl.next_rate(0.0, True) == 30.0
+    # 70 ms decodes with 1.25 headroom allow ~11 Hz: snapped down to 10
+    ctl.decoded(0.070, found=False, motion=10.0, now=0.1)
+    assert ctl.next_rate(0.1, True) == 10.0
+    assert ctl.next_rate(0.2, True) in ctl.LEVELS
+
+
+def test_rate_follows_camera_frame_rate():
+    ctl = scanner.ScanRateController()
+    for i in range(20):
+        ctl.frame_arrived(i / 16.0)
+    assert ctl.next_rate(2.0, True) == 15.0
+
+
+def test_rate_backs_off_without_new_frames_and_recovers():
+    ctl = scanner.ScanRateController()
+    rates = [ctl.next_rate(0.1 * i, False) for i in range(1, 5)]
+    # 30 / 2, / 4, / 8 (capped), snapped down
+    assert rates == [15.0, 6.0, 2.0, 2.0]
+    assert ctl.next_rate(0.6, True) == 30.0
+
+
+def test_rate_idles_without_activity_and_wakes_on_motion():
+    ctl = scanner.ScanRateController(idle_rate=4.0, idle_after=8.0)
+    ctl.decoded(0.01, found=False, motion=0.5, now=1.0)
+    assert ctl.next_rate(9.5, True) == 4.0 and ctl.idle
+    ctl.decoded(0.01, found=False, motion=20.0, now=9.6)
+    assert ctl.next_rate(9.7, True) == 30.0 and not ctl.idle
+
+
+def test_rate_wakes_on_detection():
+    ctl = scanner.ScanRateController(idle_after=8.0)
+    assert ctl.next_rate(10.0, True) == 4.0
+    ctl.decoded(0.01, found=True, motion=None, now=10.1)
+    assert ctl.next_rate(10.2, True) == 30.0
+
+
+def test_rate_reset_restores_max():
+    ctl = scanner.ScanRateController()
+    ctl.decoded(0.2, found=False, motion=None, now=0.0)
+    ctl.next_rate(0.1, False)
+    ctl.reset(5.0)
+    assert ctl.next_rate(5.1, True) == 30.0
+
+
+# --- FrameDecoder multi mode ---
+needs_cv2 = pytest.mark.skipif(
+    not (scanner.HAS_CV2 and scanner.OpenCVEngine.available()), reason="needs numpy + cv2")
+
+
+def _frame(payloads):
+    from PIL import Image
+    from renderer import RenderOptions, render_qr
+    img = Image.new('RGBA', (1280, 720), (200, 200, 200, 255))
+    for i, payload in enumerate(payloads):
+        code = render_qr(RenderOptions(data=payload, logo_path=None)).resize((220, 220))
+        img.paste(code, (100 + i * 500, 200))
+    return 1280, 720, img.tobytes()
+
+
+@needs_cv2
+def test_multi_mode_picks_up_codes_entering_the_view():
+    decoder = scanner.FrameDecoder('opencv', multi=True)
+    assert decoder(_frame(['AAA'])) == ['AAA']
+    both = _frame(['AAA', 'BBB'])
+    results = [decoder(both) for _ in range(decoder.full_every * 2)]
+    assert sorted(results[-1]) == ['AAA', 'BBB']
+    assert set(decoder.rois) == {'AAA', 'BBB'}
+
+
+@needs_cv2
+def test_multi_mode_drops_rois_of_codes_that_left():
+    decoder = scanner.FrameDecoder('opencv', multi=True, roi_ttl=2)
+    decoder(_frame(['AAA']))
+    blank = _frame([])
+    for _ in range(4):
+        decoder(blank)
+    assert decoder.rois == {}
+
+
+def test_make_engine_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        scanner.make_engine('nope')
+
+
+def test_scan_engine_is_abstract():
+    with pytest.raises(TypeError):
+        scanner.ScanEngine()
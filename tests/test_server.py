@@ -0,0 +1,144 @@
+import http.client
+import threading
+import time
+
+import pytest
+
+import server
+from server import QRService, etag_matches, make_server
+
+
+@pytest.fixture
+def httpd():
+    httpd = make_server(port=0, service=QRService(logo_path=None))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(httpd, path, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=10)
+    try:
+        conn.request('GET', path, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('*', True),
+    ('"x", W/"abc"', True),
+    ('"x" , "abc" ', True),
+    ('', False),
+    ('"abcd"', False),
+    ('abc', False),
+    ('W/"x"', False),
+])
+def test_etag_matches_uses_weak_comparison(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_serve_qr_then_revalidate(httpd, monkeypatch):
+    status, headers, body = get(httpd, '/qr?data=hello')
+    assert status == 200 and body.startswith(b'\x89PNG')
+    etag = headers['ETag']
+
+    def no_render(*args, **kwargs):
+        raise AssertionError("304 must not render")
+
+    monkeypatch.setattr(httpd.service, 'get_png', no_render)
+    for tag in (etag, 'W/' + etag, '*', '"other", ' + etag):
+        status, headers, body = get(httpd, '/qr?data=hello', {'If-None-Match': tag})
+        assert status == 304 and body == b''
+        assert headers['ETag'] == etag
+
+
+def test_stale_etag_gets_a_full_response(httpd):
+    status, _, body = get(httpd, '/qr?data=hello', {'If-None-Match': '"stale"'})
+    assert status == 200 and body.startswith(b'\x89PNG')
+
+
+def test_bad_requests(httpd):
+    assert get(httpd, '/qr')[0] == 400
+    assert get(httpd, '/qr?data=a&theme=nope')[0] == 400
+    assert get(httpd, '/qr?data=a&box=0')[0] == 400
+    assert get(httpd, '/nope')[0] == 404
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def blocking_render(monkeypatch, fail=False):
+    """Replace render_qr with one that waits for the returned Event."""
+    release = threading.Event()
+    real = server.render_qr
+
+    def render(options):
+        assert release.wait(5)
+        if fail:
+            raise RuntimeError("boom")
+        return real(options)
+
+    monkeypatch.setattr(server, 'render_qr', render)
+    return release
+
+
+def start(fn, results):
+    def run():
+        try:
+            results.append(fn())
+        except Exception as e:
+            results.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_followers_share_the_leaders_render(monkeypatch):
+    service = QRService(logo_path=None)
+    options = service.options_from_query('data=coalesce')
+    release = blocking_render(monkeypatch)
+    results = []
+    threads = [start(lambda: service.get_png(options), results)]
+    wait_for(lambda: service._in_flight)
+    threads += [start(lambda: service.get_png(options), results) for _ in range(4)]
+    wait_for(lambda: service.coalesced == 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert service.renders == 1
+    assert len(results) == 5 and len(set(results)) == 1
+    assert service._in_flight == {}
+    # Done: the next request is a plain cache hit
+    assert service.get_png(options) == results[0]
+    assert (service.renders, service.coalesced) == (1, 4)
+
+
+def test_followers_see_the_leaders_error(monkeypatch):
+    service = QRService(logo_path=None)
+    options = service.options_from_query('data=fails')
+    release = blocking_render(monkeypatch, fail=True)
+    results = []
+    threads = [start(lambda: service.get_png(options), results)]
+    wait_for(lambda: service._in_flight)
+    threads += [start(lambda: service.get_png(options), results) for _ in range(2)]
+    wait_for(lambda: service.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == 3
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert service.renders == 0 and service._in_flight == {}
@@ -0,0 +1,91 @@
+import re
+import zlib
+
+import pytest
+
+import vector
+from renderer import RenderOptions, build_qr
+
+
+def cover(rects):
+    cells = {}
+    for x, y, w, h in rects:
+        for yy in range(y, y + h):
+            for xx in range(x, x + w):
+                cells[(xx, yy)] = cells.get((xx, yy), 0) + 1
+    return cells
+
+
+@pytest.mark.parametrize('matrix', [
+    [],
+    [[False, False], [False, False]],
+    [[True, True], [True, True]],
+    [[True, False, True], [True, False, True], [False, True, False]],
+])
+def test_merged_rects_cover_exactly_the_dark_modules(matrix):
+    cells = cover(vector.merged_rects(matrix))
+    dark = {(x, y) for y, row in enumerate(matrix) for x, v in enumerate(row) if v}
+    assert set(cells) == dark
+    assert all(n == 1 for n in cells.values())
+
+
+def test_merged_rects_on_a_real_code_and_merge_vertically():
+    matrix = build_qr(RenderOptions(data='https://asset.example.com/00042')).get_matrix()
+    rects = vector.merged_rects(matrix)
+    cells = cover(rects)
+    dark = {(x, y) for y, row in enumerate(matrix) for x, v in enumerate(row) if v}
+    assert set(cells) == dark and all(n == 1 for n in cells.values())
+    # Finder pattern sides stack into tall rectangles
+    assert any(h >= 5 for _, _, _, h in rects)
+    assert len(rects) < len(dark) / 2
+
+
+def test_pdf_xref_offsets_point_at_objects():
+    pdf = vector.render_pdf(RenderOptions(data='hello', caption='ASSET 7'))
+    assert pdf.startswith(b'%PDF-1.4') and pdf.rstrip().endswith(b'%%EOF')
+    startxref = int(re.search(rb'startxref\n(\d+)\n', pdf).group(1))
+    assert pdf[startxref:].startswith(b'xref\n')
+
+    head, count = re.match(rb'xref\n0 (\d+)\n', pdf[startxref:]).group(0, 1)
+    table = pdf[startxref + len(head):].split(b'\n')[:int(count)]
+    assert all(len(line) == 19 for line in table)  # 20-byte entries incl. newline
+    for num, line in enumerate(table[1:], 1):
+        offset, _, kind = line.split()
+        if kind == b'n':
+            assert pdf[int(offset):].startswith(f"{num} 0 obj\n".encode())
+    assert re.search(rb'/Size %d ' % int(count), pdf)
+
+
+def test_pdf_stream_lengths_match():
+    pdf = vector.render_pdf(RenderOptions(data='hello', caption='C'))
+    for match in re.finditer(rb'/Length (\d+) >>\nstream\n', pdf):
+        end = match.end() + int(match.group(1))
+        assert pdf[end:end + 10] == b'\nendstream'
+
+
+def test_pdf_caption_is_centered_in_helvetica():
+    pdf = vector.render_pdf(RenderOptions(data='hello', caption='WWW iii', logo_path=None))
+    stream = re.search(rb'/Filter /FlateDecode /Length (\d+) >>\nstream\n', pdf)
+    content = zlib.decompress(pdf[stream.end():stream.end() + int(stream.group(1))])
+    size, tx = re.search(rb'BT /F1 ([\d.]+) Tf 0 g ([\d.]+) ', content).groups()
+    page_w = float(re.search(rb'/MediaBox \[0 0 ([\d.]+)', pdf).group(1))
+    text_w = vector._helvetica_width(b'WWW iii') * float(size)
+    assert float(tx) == pytest.approx((page_w - text_w) / 2, abs=0.01)
+
+
+def test_helvetica_widths():
+    assert vector._helvetica_width(b' ') == 0.278
+    assert vector._helvetica_width(b'W') == 0.944
+    assert vector._helvetica_width(b'\xe9') == 0.556  # approximated
+
+
+def test_svg_is_small_and_embeds_the_logo_once():
+    svg = vector.render_svg(RenderOptions(data='https://asset.example.com/1', caption='ASSET 1'))
+    assert svg.count(b'<image ') == 1
+    assert len(svg) < 40 * 1024
+    assert b'<text ' in svg and b'ASSET 1' in svg
+
+
+def test_svg_escapes_caption():
+    svg = vector.render_svg(RenderOptions(data='x', caption='<a & "b">', logo_path=None))
+    assert b'&lt;a &amp; &quot;b&quot;&gt;' in svg
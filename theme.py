@@ -0,0 +1,45 @@
+"""Active color theme.
+
+``theme`` holds the current palette (see palette.py) as RGBA ListProperties
+that KV rules bind to directly (``app.theme.accent``), so a theme switch or
+a resize never re-parses hex, and a switch can be animated by tweening the
+lists.
+"""
+from kivy.animation import Animation
+from kivy.event import EventDispatcher
+from kivy.properties import ListProperty, StringProperty
+
+from palette import DEFAULT_THEME, THEME_KEYS, THEME_RGBA, THEMES
+
+
+def _default(key):
+    return list(THEME_RGBA[DEFAULT_THEME][key])
+
+
+class Theme(EventDispatcher):
+    name = StringProperty(DEFAULT_THEME)
+    bg_top = ListProperty(_default('bg_top'))
+    bg_bot = ListProperty(_default('bg_bot'))
+    accent = ListProperty(_default('accent'))
+    glow = ListProperty(_default('glow'))
+    input_bg = ListProperty(_default('input_bg'))
+    fg = ListProperty(_default('fg'))
+
+    def apply(self, name, duration=0.4):
+        """Switch to theme ``name``, tweening the colors over ``duration`` seconds."""
+        colors = THEME_RGBA[name]
+        self.name = name
+        # A new switch takes over from wherever the last one got to
+        Animation.cancel_all(self)
+        if duration <= 0:
+            for key in THEME_KEYS:
+                setattr(self, key, colors[key])
+            return
+        Animation(duration=duration, t='out_quad', **{key: colors[key] for key in THEME_KEYS}).start(self)
+
+    def next_name(self):
+        names = list(THEMES)
+        return names[(names.index(self.name) + 1) % len(names)]
+
+
+theme = Theme()
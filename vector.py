@@ -0,0 +1,262 @@
+"""Vector (SVG / PDF) export of a branded QR code.
+
+Dark modules are merged into run-length rectangles, the logo is embedded
+once at print size (a palette PNG in SVG, JPEG plus a soft mask in PDF)
+and the caption is laid out as real text, so the output
+size and render time do not depend on the print resolution. Geometry is in
+module units and matches the raster pipeline in renderer.py.
+"""
+import base64
+import io
+import threading
+import zlib
+
+from PIL import Image as PilImage, ImageColor
+
+from renderer import (
+    LOGO_WIDTH_RATIO, build_qr, load_logo,
+)
+
+# The logo is embedded at twice its raster size (capped): sharp in print
+# without shipping the full-size source image in every file
+LOGO_EMBED_SCALE = 2
+LOGO_EMBED_MIN = 64
+LOGO_EMBED_MAX = 256
+LOGO_JPEG_QUALITY = 85
+
+# Encoded forms of the last logo seen. load_logo hands back the same image
+# object while it stays cached, so identity is a safe key.
+_embed_lock = threading.Lock()
+_embed_cache = {}
+
+
+def merged_rects(matrix):
+    """Merge dark modules into (x, y, w, h) rectangles.
+
+    Each row is split into horizontal runs; a run identical to one directly
+    above it extends that rectangle downwards instead of starting a new one.
+    """
+    rects = []
+    open_runs = {}  # (x, w) -> index into rects, for runs ending on the previous row
+    for y, row in enumerate(matrix):
+        runs = []
+        x, n = 0, len(row)
+        while x < n:
+            if row[x]:
+                start = x
+                while x < n and row[x]:
+                    x += 1
+                runs.append((start, x - start))
+            else:
+                x += 1
+
+        next_open = {}
+        for run in runs:
+            idx = open_runs.get(run)
+            if idx is not None:
+                rx, ry, rw, rh = rects[idx]
+                rects[idx] = (rx, ry, rw, rh + 1)
+            else:
+                idx = len(rects)
+                rects.append((run[0], y, run[1], 1))
+            next_open[run] = idx
+        open_runs = next_open
+    return rects
+
+
+def _layout(options):
+    qr = build_qr(options)
+    matrix = qr.get_matrix()
+    size = len(matrix)
+    box = float(options.box_size)
+
+    layout = {'matrix': matrix, 'size': size, 'height': size, 'logo': None, 'caption': None}
+
+    if options.logo_path:
+        w = size * LOGO_WIDTH_RATIO
+        px = int(w * box * LOGO_EMBED_SCALE)
+        logo = load_logo(options.logo_path, min(LOGO_EMBED_MAX, max(LOGO_EMBED_MIN, px)))
+        if logo is not None:
+            h = w * logo.size[1] / logo.size[0]
+            layout['logo'] = (logo, ((size - w) / 2, (size - h) / 2, w, h))
+
+    if options.caption:
+        # Same proportions as draw_caption: 8% of the width, plus 20 px padding
+        font_size = size * 0.08
+        layout['height'] = size + font_size + 20 / box
+        layout['caption'] = (options.caption, font_size, size + 5 / box)
+    return layout
+
+
+def _embedded(logo, kind):
+    """Encode the logo once per format.
+
+    'png' is a 256-color palette PNG that keeps the rounded-corner alpha;
+    'jpeg' is the RGB plane and 'alpha' the zlib'd mask, for PDF.
+    """
+    with _embed_lock:
+        cached = _embed_cache.get(kind)
+        if cached is not None and cached[0] is logo:
+            return cached[1]
+    if kind == 'png':
+        buf = io.BytesIO()
+        logo.quantize(256, method=PilImage.Quantize.FASTOCTREE).save(buf, format='PNG', optimize=True)
+        data = buf.getvalue()
+    elif kind == 'jpeg':
+        buf = io.BytesIO()
+        logo.convert('RGB').save(buf, format='JPEG', quality=LOGO_JPEG_QUALITY)
+        data = buf.getvalue()
+    else:
+        data = zlib.compress(logo.getchannel('A').tobytes())
+    with _embed_lock:
+        _embed_cache[kind] = (logo, data)
+    return data
+
+
+def _hex(color):
+    return '#%02x%02x%02x' % ImageColor.getrgb(color)[:3]
+
+
+def _escape_xml(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+# --- SVG ---
+def render_svg(options, module_size=None):
+    """Return the code as SVG bytes. ``module_size`` (px) sets the nominal size."""
+    layout = _layout(options)
+    size, height = layout['size'], layout['height']
+    scale = module_size or options.box_size
+
+    path = ''.join(f"M{x} {y}h{w}v{h}h-{w}z" for x, y, w, h in merged_rects(layout['matrix']))
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="{size * scale:g}" height="{height * scale:g}" '
+        f'viewBox="0 0 {size:g} {height:g}" shape-rendering="crispEdges">',
+        f'<rect width="{size:g}" height="{height:g}" fill="{_hex(options.back_color)}"/>',
+        f'<path fill="{_hex(options.fill_color)}" d="{path}"/>',
+    ]
+
+    if layout['logo'] is not None:
+        logo, (x, y, w, h) = layout['logo']
+        data = base64.b64encode(_embedded(logo, 'png')).decode('ascii')
+        parts.append(f'<image x="{x:g}" y="{y:g}" width="{w:g}" height="{h:g}" preserveAspectRatio="none" '
+                     f'xlink:href="data:image/png;base64,{data}"/>')
+
+    if layout['caption'] is not None:
+        text, font_size, top = layout['caption']
+        # Explicit baseline: dominant-baseline support varies between renderers
+        parts.append(f'<text x="{size / 2:g}" y="{top + font_size * 0.8:g}" font-size="{font_size:g}" '
+                     f'font-family="Roboto, Arial, Helvetica, sans-serif" text-anchor="middle" '
+                     f'fill="#000000">{_escape_xml(text)}</text>')
+
+    parts.append('</svg>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+# --- PDF ---
+def _pdf_color(color):
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return f"{r / 255:.4f} {g / 255:.4f} {b / 255:.4f}"
+
+
+# Advance widths (1/1000 em) of the standard Helvetica font for WinAnsi 32..126
+_HELVETICA_ASCII = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+
+
+def _helvetica_width(raw):
+    """Width in em of WinAnsi bytes set in Helvetica; non-ASCII glyphs are approximated."""
+    return sum(_HELVETICA_ASCII[b - 32] if 32 <= b <= 126 else 556 for b in raw) / 1000.0
+
+
+def _pdf_encode(text):
+    return text.encode('cp1252', errors='replace')
+
+
+def _pdf_text(text):
+    raw = _pdf_encode(text)
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def render_pdf(options, module_pt=None):
+    """Return a one-page PDF. ``module_pt`` is the module size in points (default 72 dpi pixels)."""
+    layout = _layout(options)
+    size, height = layout['size'], layout['height']
+    unit = module_pt or float(options.box_size) * 0.75
+    page_w, page_h = size * unit, height * unit
+
+    # PDF's origin is bottom-left: flip y once with the CTM, then draw in module units
+    ops = [f"q {unit:.4f} 0 0 {-unit:.4f} 0 {page_h:.4f} cm",
+           f"{_pdf_color(options.back_color)} rg 0 0 {size} {height} re f",
+           f"{_pdf_color(options.fill_color)} rg"]
+    ops.extend(f"{x} {y} {w} {h} re" for x, y, w, h in merged_rects(layout['matrix']))
+    ops.append("f")
+
+    objects = {}
+    resources = []
+    if layout['logo'] is not None:
+        logo, (x, y, w, h) = layout['logo']
+        lw, lh = logo.size
+        objects[6] = (f"<< /Type /XObject /Subtype /Image /Width {lw} /Height {lh} /ColorSpace /DeviceGray "
+                      f"/BitsPerComponent 8 /Filter /FlateDecode", _embedded(logo, 'alpha'))
+        objects[5] = (f"<< /Type /XObject /Subtype /Image /Width {lw} /Height {lh} /ColorSpace /DeviceRGB "
+                      f"/BitsPerComponent 8 /SMask 6 0 R /Filter /DCTDecode", _embedded(logo, 'jpeg'))
+        resources.append("/XObject << /Logo 5 0 R >>")
+        # Images fill the unit square upwards; undo the flip locally
+        ops.append(f"q {w:.4f} 0 0 {-h:.4f} {x:.4f} {y + h:.4f} cm /Logo Do Q")
+    ops.append("Q")
+
+    content = '\n'.join(ops).encode('ascii')
+    if layout['caption'] is not None:
+        text, font_size, top = layout['caption']
+        # Center with the metrics of the font actually drawn, not the raster one
+        text_w = _helvetica_width(_pdf_encode(text)) * font_size
+        tx = (size - text_w) / 2 * unit
+        ty = page_h - (top + font_size * 0.8) * unit
+        content += (f"\nBT /F1 {font_size * unit:.4f} Tf 0 g {tx:.4f} {ty:.4f} Td (").encode('ascii') \
+            + _pdf_text(text) + b") Tj ET"
+        objects[7] = ("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>", None)
+        resources.append("/Font << /F1 7 0 R >>")
+
+    objects[1] = ("<< /Type /Catalog /Pages 2 0 R >>", None)
+    objects[2] = ("<< /Type /Pages /Kids [3 0 R] /Count 1 >>", None)
+    objects[3] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w:.4f} {page_h:.4f}] "
+                  f"/Resources << {' '.join(resources)} >> /Contents 4 0 R >>", None)
+    compressed = zlib.compress(content)
+    objects[4] = ("<< /Filter /FlateDecode", compressed)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for num in sorted(objects):
+        head, stream = objects[num]
+        offsets[num] = out.tell()
+        out.write(f"{num} 0 obj\n".encode('ascii'))
+        if stream is None:
+            out.write(head.encode('ascii'))
+        else:
+            out.write(f"{head} /Length {len(stream)} >>\nstream\n".encode('ascii'))
+            out.write(stream)
+            out.write(b"\nendstream")
+        out.write(b"\nendobj\n")
+
+    xref = out.tell()
+    count = max(objects) + 1
+    out.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode('ascii'))
+    for num in range(1, count):
+        if num in offsets:
+            out.write(f"{offsets[num]:010d} 00000 n \n".encode('ascii'))
+        else:
+            out.write(b"0000000000 65535 f \n")
+    out.write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('ascii'))
+    return out.getvalue()
+
+
+EXPORTERS = {'svg': render_svg, 'pdf': render_pdf}
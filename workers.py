@@ -0,0 +1,161 @@
+"""Background workers that keep heavy work off the Kivy main thread.
+
+No Kivy imports here: results are handed back through a ``deliver`` callable,
+which the app sets to something that schedules onto the Kivy clock.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from perf import metrics
+
+
+def call_now(fn):
+    fn()
+
+
+class LatestOnlyExecutor:
+    """Thread pool where each submit supersedes the previous ones.
+
+    Pending jobs are cancelled outright; jobs already running finish, but
+    their results are dropped instead of being delivered. A running job can
+    poll ``cancelled()`` to give up early once it has been superseded.
+    """
+
+    def __init__(self, max_workers=1, deliver=call_now, name='worker'):
+        self.deliver = deliver
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = []
+        self._local = threading.local()
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            for future in self._pending:
+                future.cancel()
+            future = self._pool.submit(self._run, generation, fn, args)
+            self._pending = [future]
+        future.add_done_callback(lambda f: self._finish(f, generation, on_done, on_error))
+        return generation
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            for future in self._pending:
+                future.cancel()
+            self._pending = []
+
+    def is_current(self, generation):
+        return generation == self._generation
+
+    def cancelled(self):
+        """From inside a job: True once a newer submit or cancel() has superseded it."""
+        return not self.is_current(getattr(self._local, 'generation', None))
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False)
+
+    def _run(self, generation, fn, args):
+        self._local.generation = generation
+        return fn(*args)
+
+    def _finish(self, future, generation, on_done, on_error):
+        if future.cancelled() or not self.is_current(generation):
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                self.deliver(lambda: self.is_current(generation) and on_error(error))
+            else:
+                metrics.error(self.name, error)
+            return
+        result = future.result()
+        if on_done is not None:
+            # Re-check on delivery: a newer submit may land before the clock tick
+            self.deliver(lambda: self.is_current(generation) and on_done(result))
+
+
+class LatestFrameWorker:
+    """Single-slot mailbox in front of a worker thread.
+
+    ``offer`` overwrites whatever frame is waiting, so a slow ``process``
+    always sees the newest frame and stale ones are dropped, never queued.
+    Non-None results are handed to ``on_result`` through ``deliver``.
+    ``process`` never runs on two threads at once, even across a quick
+    stop()/start(), so it may reuse buffers between calls.
+    """
+
+    def __init__(self, process, on_result, deliver=call_now, name='frame-worker'):
+        self.process = process
+        self.on_result = on_result
+        self.deliver = deliver
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.busy = False
+        self._cond = threading.Condition()
+        # Held around process(): a thread from a previous run may still be inside it
+        self._process_lock = threading.Lock()
+        self._slot = None
+        # Bumped on every start/stop so a thread from a previous run exits
+        self._epoch = 0
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._slot = None
+            self._epoch += 1
+            epoch = self._epoch
+        threading.Thread(target=self._loop, args=(epoch,), name=self.name, daemon=True).start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._slot = None
+            self._epoch += 1
+            self._cond.notify_all()
+
+    def offer(self, frame):
+        with self._cond:
+            if not self._running:
+                return
+            if self._slot is not None:
+                self.dropped += 1
+                metrics.incr(f"{self.name}.dropped")
+            self._slot = frame
+            self._cond.notify_all()
+
+    def _loop(self, epoch):
+        while True:
+            with self._cond:
+                while self._epoch == epoch and self._slot is None:
+                    self._cond.wait()
+                if self._epoch != epoch:
+                    return
+                frame, self._slot = self._slot, None
+            with self._process_lock:
+                if self._epoch != epoch:
+                    # Stopped while the previous run's thread finished up
+                    return
+                self.busy = True
+                try:
+                    result = self.process(frame)
+                except Exception as e:
+                    metrics.error(self.name, e)
+                    result = None
+                finally:
+                    self.busy = False
+            self.processed += 1
+            if result is not None:
+                self.deliver(lambda: self._epoch == epoch and self.on_result(result))